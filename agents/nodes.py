@@ -1,53 +1,112 @@
+import asyncio
 import openai
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 
 from config.config import settings
 from utils.agent_utils import (
     log_thought,
-    get_search_results,
+    aget_search_results,
+    canonical_url,
     clean_competitor_names,
-    extract_company_info,
-    extract_competitor_names,
-    search_external_data,
-    get_company_website,
-    generate_competitor_analysis,
+    aextract_company_info,
+    aextract_competitor_names_batch,
+    asearch_external_source,
+    combine_external_data,
+    EXTERNAL_DATA_QUERIES,
+    aget_company_website,
+    agenerate_competitor_analysis_parallel,
+    agenerate_competitor_analysis_stream,
+    agenerate_report_sections,
+    agenerate_sections_parallel,
+    ANALYSIS_ERROR_PREFIX,
+    REPORT_GENERATION_MODES,
+)
+from utils.async_utils import run_sync
+from utils.dedup import drop_near_duplicates
+from utils.gazetteer import gazetteer
+from utils.http_client import get_async_openai_client
+from utils.metrics import MOCK_FALLBACKS, REPORT_SECTION_REFRESHES, record_cache
+from utils.report_sections import (
+    REPORT_SECTIONS,
+    fingerprint_inputs,
+    section_fingerprints,
+    splice_report,
+    split_report,
+    stale_sections,
 )
 from .state import CompetitorAnalysisState
 
 
+# Custom event carrying incremental report text
+REPORT_CHUNK_EVENT = "report_chunk"
+
+
 class CompetitorAnalysisNodes:
     """LangGraph nodes for competitor analysis workflow."""
     
     def __init__(self):
         if settings.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL or None,
+                max_retries=0
+            )
             self.llm = ChatOpenAI(
                 model="gpt-4o",
                 api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL or None,
                 temperature=0.1
             )
         else:
             self.openai_client = None
             self.llm = None
     
+    @property
+    def async_openai_client(self) -> Optional[openai.AsyncOpenAI]:
+        """AsyncOpenAI client bound to the running event loop."""
+        if not settings.OPENAI_API_KEY:
+            return None
+        return get_async_openai_client(settings.OPENAI_API_KEY)
+    
+    @property
+    def parallel_sections(self) -> bool:
+        """Whether report sections are generated as parallel completions."""
+        mode = settings.REPORT_GENERATION_MODE
+        if mode not in REPORT_GENERATION_MODES:
+            raise ValueError(f"Unknown report generation mode: {mode}")
+        return mode == "parallel"
+    
     def input_classifier_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
         """Classifies input and determines the workflow path."""
         log_thought("🔍 Classifying input type...")
         
         company_name_or_website = state["company_name_or_website"]
         is_website = company_name_or_website.startswith(("http://", "https://", "www."))
+        if is_website:
+            next_step = "website_analysis"
+        elif state.get("selected_competitor"):
+            # The competitor is already chosen, so a competitor search would go unused
+            next_step = "competitor_selection"
+        else:
+            next_step = "competitor_search"
         
         updates = {
             "is_website_input": is_website,
             "target_company": company_name_or_website,
-            "next_step": "website_analysis" if is_website else "competitor_search"
+            "next_step": next_step
         }
         
         log_thought(f"✅ Input classified as: {'Website' if is_website else 'Company Name'}")
         return updates
     
     def competitor_search_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Sync wrapper around acompetitor_search_node."""
+        return run_sync(self.acompetitor_search_node(state))
+    
+    async def acompetitor_search_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
         """Searches for competitors based on company name and location."""
         log_thought("🔎 Searching for competitors...")
         
@@ -61,21 +120,41 @@ class CompetitorAnalysisNodes:
             }
         
         # Get search results
-        search_urls = get_search_results(company_name, location)
-        competitor_names = []
-        
-        # Extract competitor names from search results
-        for url in search_urls:
-            page_data = extract_company_info(url)
-            if page_text := page_data.get("description", ""):
-                if self.openai_client:
-                    names = extract_competitor_names(self.openai_client, page_text)
-                    competitor_names.extend(names)
-                else:
-                    # Fallback to simple text extraction if no API key
-                    competitor_names.extend(page_text.split()[:10])
-        
-        cleaned_names = clean_competitor_names(competitor_names)
+        search_urls = await aget_search_results(company_name, location)
+        
+        # Scrape result pages concurrently, then extract names in one batched call
+        pages = await asyncio.gather(*(aextract_company_info(canonical_url(url)) for url in search_urls))
+        page_texts = {
+            url: page.get("description", "")
+            for url, page in zip(search_urls, pages)
+        }
+        
+        # The searched company is mentioned on every page about it but is not its own competitor
+        query = company_name.strip().lower()
+        
+        # Known brands are matched directly; the LLM is only asked when too few are found
+        brand_counts = gazetteer.match(page_texts.values()) if gazetteer else {}
+        brand_counts = {name: count for name, count in brand_counts.items() if name.lower() != query}
+        if gazetteer:
+            record_cache("gazetteer", len(brand_counts) >= settings.GAZETTEER_MIN_BRANDS)
+        if len(brand_counts) >= settings.GAZETTEER_MIN_BRANDS:
+            log_thought(f"📖 Gazetteer matched {len(brand_counts)} known brands, skipping LLM extraction")
+            # Canonical names are already clean, most mentioned first
+            cleaned_names = list(brand_counts)
+        elif self.async_openai_client:
+            competitor_names = await aextract_competitor_names_batch(self.async_openai_client, page_texts)
+            cleaned_names = [
+                name for name in clean_competitor_names(competitor_names) if name.lower() != query
+            ]
+            if gazetteer:
+                gazetteer.learn(cleaned_names)
+        else:
+            # Fallback to simple text extraction if no API key
+            MOCK_FALLBACKS.inc(component="competitor_extraction")
+            competitor_names = []
+            for page_text in page_texts.values():
+                competitor_names.extend(page_text.split()[:10])
+            cleaned_names = clean_competitor_names(competitor_names)
         
         updates = {
             "search_urls": search_urls,
@@ -87,6 +166,10 @@ class CompetitorAnalysisNodes:
         return updates
     
     def competitor_selection_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Sync wrapper around acompetitor_selection_node."""
+        return run_sync(self.acompetitor_selection_node(state))
+    
+    async def acompetitor_selection_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
         """Handles competitor selection logic."""
         log_thought("🎯 Processing competitor selection...")
         
@@ -99,7 +182,7 @@ class CompetitorAnalysisNodes:
             }
         
         # Find website for selected competitor
-        website = get_company_website(selected_competitor)
+        website = await aget_company_website(selected_competitor)
         
         if not website:
             return {
@@ -132,20 +215,52 @@ class CompetitorAnalysisNodes:
         return updates
     
     def data_collection_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
-        """Collects company data and external market data."""
+        """Starts data collection; the source branches fan out from here."""
         log_thought("📊 Collecting company and market data...")
-        
-        target_company = state["target_company"]
+        return {"company_data": {}, "external_data": {}}
+    
+    async def acompany_site_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Scrapes the target company's own website."""
         website = state["company_website"]
-        
-        # Collect company data
-        company_data = extract_company_info(website) if website else {}
-        
-        # Collect external data
-        external_data = search_external_data(target_company)
+        company_data = await aextract_company_info(website) if website else {}
+        return {"company_data": company_data}
+    
+    async def _acollect_external_source(self, state: CompetitorAnalysisState, source: str) -> Dict[str, Any]:
+        """Collects one external data source into its state section."""
+        text = await asearch_external_source(state["target_company"], source)
+        return {"external_sections": {source: text}}
+    
+    async def areviews_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Collects customer reviews."""
+        return await self._acollect_external_source(state, "reviews")
+    
+    async def amarket_analysis_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Collects market analysis."""
+        return await self._acollect_external_source(state, "market_analysis")
+    
+    async def afinancials_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Collects financial data."""
+        return await self._acollect_external_source(state, "financials")
+    
+    async def athird_party_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Collects third-party evaluations."""
+        return await self._acollect_external_source(state, "third_party")
+    
+    def data_merge_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
+        """Joins the data collection branches into the report inputs."""
+        # Drop sources that are near-copies of the company site or an earlier source
+        sections = state.get("external_sections", {})
+        texts = drop_near_duplicates(
+            [
+                ("company", state.get("company_data", {}).get("description", "")),
+                *((source, sections.get(source, "")) for source in EXTERNAL_DATA_QUERIES)
+            ],
+            max_distance=settings.DEDUP_MAX_DISTANCE
+        )
+        texts.pop("company")
+        external_data = combine_external_data(texts)
         
         updates = {
-            "company_data": company_data,
             "external_data": external_data,
             "next_step": "analysis_generation"
         }
@@ -153,8 +268,80 @@ class CompetitorAnalysisNodes:
         log_thought("✅ Data collection completed")
         return updates
     
+    async def _emit_report_chunk(self, text: str, config: Optional[RunnableConfig]) -> None:
+        """Dispatches report text to stream consumers when running inside the graph."""
+        if config is not None:
+            await adispatch_custom_event(REPORT_CHUNK_EVENT, {"text": text}, config=config)
+    
+    async def _arefresh_report(
+        self,
+        state: CompetitorAnalysisState,
+        config: Optional[RunnableConfig]
+    ) -> Optional[str]:
+        """
+        Refreshes the previous report, regenerating only the sections whose
+        sources changed. Returns None when a full report should be generated.
+        """
+        previous = state["previous_report"]
+        if split_report(previous["report"]) is None:
+            log_thought("♻️ Previous report has unexpected sections, regenerating it in full")
+            return None
+        
+        current = section_fingerprints(fingerprint_inputs(state))
+        stale = stale_sections(previous.get("section_fingerprints") or {}, current)
+        if len(stale) == len(REPORT_SECTIONS):
+            return None
+        
+        if not stale:
+            log_thought("♻️ Sources unchanged since the previous report, reusing it")
+            report = previous["report"]
+        else:
+            log_thought(f"♻️ Regenerating {len(stale)} of {len(REPORT_SECTIONS)} sections: {', '.join(stale)}")
+            args = (
+                self.async_openai_client,
+                state["target_company"],
+                state.get("company_data", {}),
+                state.get("external_data", {}),
+                stale
+            )
+            if self.parallel_sections:
+                # The takeaways are synthesized from the unchanged sections too
+                regenerated = {
+                    title: text async for title, text
+                    in agenerate_sections_parallel(*args, context=split_report(previous["report"])[1])
+                }
+            else:
+                split = split_report(await agenerate_report_sections(*args), stale)
+                if split is None:
+                    log_thought("♻️ Regenerated sections could not be matched, regenerating the report in full")
+                    return None
+                regenerated = split[1]
+            report = splice_report(previous["report"], regenerated)
+        
+        REPORT_SECTION_REFRESHES.inc(len(REPORT_SECTIONS) - len(stale), result="reused")
+        REPORT_SECTION_REFRESHES.inc(len(stale), result="regenerated")
+        await self._emit_report_chunk(report, config)
+        return report
+    
     def analysis_generation_node(self, state: CompetitorAnalysisState) -> Dict[str, Any]:
-        """Generates the final competitor analysis report."""
+        """Sync wrapper around aanalysis_generation_node."""
+        return run_sync(self.aanalysis_generation_node(state))
+    
+    async def aanalysis_generation_node(
+        self,
+        state: CompetitorAnalysisState,
+        config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        """
+        Generates the final competitor analysis report.
+        
+        The report is streamed from the model and every delta is dispatched
+        as a "report_chunk" custom event for astream_events consumers. In
+        parallel mode each section is its own completion, dispatched in
+        report order as soon as the sections before it are done. When
+        refreshing a previous report, only sections whose sources changed
+        are regenerated and the spliced report is dispatched at once.
+        """
         log_thought("📝 Generating competitor analysis report...")
         
         target_company = state["target_company"]
@@ -162,15 +349,45 @@ class CompetitorAnalysisNodes:
         external_data = state.get("external_data", {})
         
         # Generate analysis report
-        if self.openai_client:
-            analysis_report = generate_competitor_analysis(
-                self.openai_client,
-                target_company,
-                company_data,
-                external_data
-            )
-        else:
+        analysis_report = None
+        error_message = None
+        if self.async_openai_client and state.get("previous_report"):
+            try:
+                analysis_report = await self._arefresh_report(state, config)
+            except Exception as e:
+                log_thought(f"⚠️ Incremental refresh failed, regenerating the report in full: {e}")
+        
+        if analysis_report is None and self.async_openai_client:
+            if self.parallel_sections:
+                generate = agenerate_competitor_analysis_parallel
+            else:
+                generate = agenerate_competitor_analysis_stream
+            parts = []
+            try:
+                async for delta in generate(
+                    self.async_openai_client,
+                    target_company,
+                    company_data,
+                    external_data
+                ):
+                    parts.append(delta)
+                    await self._emit_report_chunk(delta, config)
+                analysis_report = "".join(parts).strip()
+            except Exception as e:
+                # Text streamed before the failure is a truncated report, never to be stored
+                error_message = f"{ANALYSIS_ERROR_PREFIX}: {str(e)}"
+        elif analysis_report is None:
+            MOCK_FALLBACKS.inc(component="analysis")
             analysis_report = f"Mock analysis report for {target_company} (OpenAI API key not configured)"
+            await self._emit_report_chunk(analysis_report, config)
+        
+        if error_message:
+            return {
+                "analysis_report": error_message,
+                "error_message": error_message,
+                "workflow_completed": True,
+                "next_step": "end"
+            }
         
         updates = {
             "analysis_report": analysis_report,
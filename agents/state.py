@@ -1,5 +1,18 @@
 from typing import List, Dict, Optional, Any
-from typing_extensions import TypedDict
+from typing_extensions import Annotated, TypedDict
+
+
+def merge_dicts(left: Optional[Dict[str, str]], right: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Reducer that merges dict updates written by parallel branches."""
+    return {**(left or {}), **(right or {})}
+
+
+def sum_counts(left: Optional[Dict[str, int]], right: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Reducer that adds up counters returned by different nodes."""
+    totals = dict(left or {})
+    for key, value in (right or {}).items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
 
 
 class CompetitorAnalysisState(TypedDict):
@@ -19,11 +32,17 @@ class CompetitorAnalysisState(TypedDict):
     
     # Company data
     company_data: Dict[str, str]
+    external_sections: Annotated[Dict[str, str], merge_dicts]
     external_data: Dict[str, str]
     
+    # Stored report being refreshed: its text and per-section source fingerprints
+    previous_report: Optional[Dict[str, Any]]
+    
     # Output
     analysis_report: str
     error_message: Optional[str]
+    # OpenAI tokens used by the run, summed over nodes
+    token_usage: Annotated[Dict[str, int], sum_counts]
     
     # Workflow control
     next_step: str
@@ -1,6 +1,18 @@
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, END
+
+from config.config import settings
+from utils.agent_utils import log_thought
+from utils.async_utils import run_sync
+from utils.metrics import instrument_node, track_workflow
+from utils.token_usage import with_token_usage
 from .state import CompetitorAnalysisState
-from .nodes import CompetitorAnalysisNodes
+from .nodes import REPORT_CHUNK_EVENT, CompetitorAnalysisNodes
 
 
 class CompetitorAnalysisWorkflow:
@@ -8,7 +20,20 @@ class CompetitorAnalysisWorkflow:
     
     def __init__(self):
         self.nodes = CompetitorAnalysisNodes()
+        self.checkpointer = MemorySaver()
         self.workflow = self._create_workflow()
+        # session id -> competitor search checkpoint to resume analyses from
+        self._session_checkpoints: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def _data_collection_branches(self) -> dict:
+        """Independent data collection branches run concurrently."""
+        return {
+            "company_site": self.nodes.acompany_site_node,
+            "reviews": self.nodes.areviews_node,
+            "market_analysis": self.nodes.amarket_analysis_node,
+            "financials": self.nodes.afinancials_node,
+            "third_party": self.nodes.athird_party_node,
+        }
     
     def _create_workflow(self) -> StateGraph:
         """Creates and configures the LangGraph workflow."""
@@ -16,14 +41,21 @@ class CompetitorAnalysisWorkflow:
         # Create the state graph
         workflow = StateGraph(CompetitorAnalysisState)
         
+        def add_node(name: str, node) -> None:
+            # Every node reports its latency and errors to /metrics and the tokens it used
+            workflow.add_node(name, instrument_node(name, with_token_usage(node)))
+        
         # Add nodes
-        workflow.add_node("input_classifier", self.nodes.input_classifier_node)
-        workflow.add_node("competitor_search", self.nodes.competitor_search_node)
-        workflow.add_node("competitor_selection", self.nodes.competitor_selection_node)
-        workflow.add_node("website_analysis", self.nodes.website_analysis_node)
-        workflow.add_node("data_collection", self.nodes.data_collection_node)
-        workflow.add_node("analysis_generation", self.nodes.analysis_generation_node)
-        workflow.add_node("error", self.nodes.error_node)
+        add_node("input_classifier", self.nodes.input_classifier_node)
+        add_node("competitor_search", self.nodes.acompetitor_search_node)
+        add_node("competitor_selection", self.nodes.acompetitor_selection_node)
+        add_node("website_analysis", self.nodes.website_analysis_node)
+        add_node("data_collection", self.nodes.data_collection_node)
+        for branch, node in self._data_collection_branches().items():
+            add_node(branch, node)
+        add_node("data_merge", self.nodes.data_merge_node)
+        add_node("analysis_generation", self.nodes.aanalysis_generation_node)
+        add_node("error", self.nodes.error_node)
         
         # Set entry point
         workflow.set_entry_point("input_classifier")
@@ -34,6 +66,7 @@ class CompetitorAnalysisWorkflow:
             self.nodes.should_continue,
             {
                 "competitor_search": "competitor_search",
+                "competitor_selection": "competitor_selection",
                 "website_analysis": "website_analysis",
                 "error": "error",
                 "end": END
@@ -70,8 +103,14 @@ class CompetitorAnalysisWorkflow:
             }
         )
         
+        # Fan out data collection and join the branches before the report
+        branches = list(self._data_collection_branches())
+        for branch in branches:
+            workflow.add_edge("data_collection", branch)
+        workflow.add_edge(branches, "data_merge")
+        
         workflow.add_conditional_edges(
-            "data_collection",
+            "data_merge",
             self.nodes.should_continue,
             {
                 "analysis_generation": "analysis_generation",
@@ -97,26 +136,17 @@ class CompetitorAnalysisWorkflow:
             }
         )
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
     
-    def run_analysis(
+    def _initial_state(
         self,
         company_name_or_website: str,
-        location: str = "global",
-        selected_competitor: str = None
+        location: str,
+        selected_competitor: str = None,
+        previous_report: Optional[Dict[str, Any]] = None
     ) -> CompetitorAnalysisState:
-        """
-        Runs the competitor analysis workflow.
-        
-        Args:
-            company_name_or_website: Company name or website URL
-            location: Geographic location for competitor search
-            selected_competitor: Specific competitor to analyze
-            
-        Returns:
-            Final state with analysis results
-        """
-        initial_state = CompetitorAnalysisState(
+        """Builds an empty workflow state for the given inputs."""
+        return CompetitorAnalysisState(
             company_name_or_website=company_name_or_website,
             location=location,
             selected_competitor=selected_competitor,
@@ -126,21 +156,184 @@ class CompetitorAnalysisWorkflow:
             target_company="",
             company_website=None,
             company_data={},
+            external_sections={},
             external_data={},
+            previous_report=previous_report,
             analysis_report="",
             error_message=None,
+            token_usage={},
             next_step="",
             workflow_completed=False
         )
+    
+    def _run_config(self, thread_id: str) -> RunnableConfig:
+        """Builds the run config for a checkpointed thread."""
+        return {
+            "configurable": {"thread_id": thread_id},
+            "max_concurrency": settings.MAX_CONCURRENCY
+        }
+    
+    def _session_key(self, company_name: str, location: str) -> Tuple[str, str]:
+        """Normalized inputs a session checkpoint was created for."""
+        return company_name.strip().lower(), (location or "global").strip().lower()
+    
+    def _save_session_checkpoint(self, session_id: str, key: Tuple[str, str], config: RunnableConfig) -> None:
+        """Remembers a session's search checkpoint, pruning the oldest sessions."""
+        self._remember_session(session_id, {
+            "key": key,
+            "thread_id": config["configurable"]["thread_id"],
+            "config": config
+        })
+    
+    def _remember_session(self, session_id: str, checkpoint: Dict[str, Any]) -> None:
+        previous = self._session_checkpoints.pop(session_id, None)
+        self._session_checkpoints[session_id] = checkpoint
+        if previous:
+            self._release_thread(previous["thread_id"])
+        while len(self._session_checkpoints) > settings.SESSION_CHECKPOINT_LIMIT:
+            _, evicted = self._session_checkpoints.popitem(last=False)
+            self._release_thread(evicted["thread_id"])
+    
+    def _release_thread(self, thread_id: str) -> None:
+        """Deletes a checkpoint thread once no session refers to it anymore."""
+        if not any(checkpoint["thread_id"] == thread_id for checkpoint in self._session_checkpoints.values()):
+            self.checkpointer.delete_thread(thread_id)
+    
+    def share_session_checkpoint(self, source_session_id: str, session_id: str) -> None:
+        """Lets a session resume from the competitor search another session ran for it."""
+        checkpoint = self._session_checkpoints.get(source_session_id)
+        if checkpoint and source_session_id != session_id:
+            self._remember_session(session_id, dict(checkpoint))
+    
+    async def _prepare_run(
+        self,
+        company_name_or_website: str,
+        location: str,
+        selected_competitor: Optional[str],
+        session_id: Optional[str],
+        previous_report: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[CompetitorAnalysisState], RunnableConfig, Optional[str]]:
+        """
+        Returns the input, config and throwaway thread id for an analysis run.
+        
+        When the session already ran the competitor search for the same inputs,
+        the run forks from that checkpoint with the selection applied, so it
+        resumes at competitor_selection instead of searching again.
+        """
+        checkpoint = self._session_checkpoints.get(session_id) if session_id else None
+        if (
+            checkpoint
+            and selected_competitor
+            and checkpoint["key"] == self._session_key(company_name_or_website, location)
+        ):
+            log_thought("♻️ Resuming from the session's competitor search checkpoint")
+            self._session_checkpoints.move_to_end(session_id)
+            config = await self.workflow.aupdate_state(
+                checkpoint["config"],
+                {"selected_competitor": selected_competitor, "previous_report": previous_report}
+            )
+            return None, {**self._run_config(checkpoint["thread_id"]), "configurable": config["configurable"]}, None
+        
+        thread_id = str(uuid.uuid4())
+        initial_state = self._initial_state(company_name_or_website, location, selected_competitor, previous_report)
+        return initial_state, self._run_config(thread_id), thread_id
+    
+    def run_analysis(
+        self,
+        company_name_or_website: str,
+        location: str = "global",
+        selected_competitor: str = None,
+        session_id: Optional[str] = None
+    ) -> CompetitorAnalysisState:
+        """Sync wrapper around arun_analysis."""
+        return run_sync(self.arun_analysis(company_name_or_website, location, selected_competitor, session_id))
+    
+    async def arun_analysis(
+        self,
+        company_name_or_website: str,
+        location: str = "global",
+        selected_competitor: str = None,
+        session_id: Optional[str] = None,
+        previous_report: Optional[Dict[str, Any]] = None
+    ) -> CompetitorAnalysisState:
+        """
+        Runs the competitor analysis workflow.
+        
+        Args:
+            company_name_or_website: Company name or website URL
+            location: Geographic location for competitor search
+            selected_competitor: Specific competitor to analyze
+            session_id: Session whose competitor search checkpoint may be reused
+            previous_report: Stored report to refresh; only sections whose
+                sources changed are regenerated
+            
+        Returns:
+            Final state with analysis results
+        """
+        input_state, config, thread_id = await self._prepare_run(
+            company_name_or_website, location, selected_competitor, session_id, previous_report
+        )
         
         # Run the workflow
-        final_state = self.workflow.invoke(initial_state)
-        return final_state
+        try:
+            with track_workflow("analysis"):
+                return await self.workflow.ainvoke(input_state, config)
+        finally:
+            if thread_id:
+                self.checkpointer.delete_thread(thread_id)
+    
+    async def astream_analysis(
+        self,
+        company_name_or_website: str,
+        location: str = "global",
+        selected_competitor: str = None,
+        session_id: Optional[str] = None,
+        previous_report: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs the competitor analysis workflow, streaming the report as it is generated.
+        
+        Args:
+            company_name_or_website: Company name or website URL
+            location: Geographic location for competitor search
+            selected_competitor: Specific competitor to analyze
+            session_id: Session whose competitor search checkpoint may be reused
+            previous_report: Stored report to refresh; only sections whose
+                sources changed are regenerated
+            
+        Yields:
+            {"type": "chunk", "text": ...} for every report delta, then
+            {"type": "final", "state": ...} with the final state
+        """
+        input_state, config, thread_id = await self._prepare_run(
+            company_name_or_website, location, selected_competitor, session_id, previous_report
+        )
+        
+        try:
+            with track_workflow("analysis"):
+                async for event in self.workflow.astream_events(input_state, config, version="v2"):
+                    if event["event"] == "on_custom_event" and event["name"] == REPORT_CHUNK_EVENT:
+                        yield {"type": "chunk", "text": event["data"]["text"]}
+                    elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+                        yield {"type": "final", "state": event["data"]["output"]}
+        finally:
+            if thread_id:
+                self.checkpointer.delete_thread(thread_id)
     
     def get_competitors(
         self,
         company_name: str,
-        location: str = "global"
+        location: str = "global",
+        session_id: Optional[str] = None
+    ) -> list[str]:
+        """Sync wrapper around aget_competitors."""
+        return run_sync(self.aget_competitors(company_name, location, session_id))
+    
+    async def aget_competitors(
+        self,
+        company_name: str,
+        location: str = "global",
+        session_id: Optional[str] = None
     ) -> list[str]:
         """
         Gets list of competitors for dropdown population.
@@ -148,6 +341,8 @@ class CompetitorAnalysisWorkflow:
         Args:
             company_name: Company name to search competitors for
             location: Geographic location for search
+            session_id: Session to checkpoint the search for, so a later
+                analysis can resume from it
             
         Returns:
             List of competitor names
@@ -158,32 +353,24 @@ class CompetitorAnalysisWorkflow:
         if not location:
             return []
         
-        # Run partial workflow to get competitors
-        initial_state = CompetitorAnalysisState(
-            company_name_or_website=company_name,
-            location=location,
-            selected_competitor=None,
-            is_website_input=False,
-            search_urls=[],
-            competitor_names=[],
-            target_company="",
-            company_website=None,
-            company_data={},
-            external_data={},
-            analysis_report="",
-            error_message=None,
-            next_step="",
-            workflow_completed=False
-        )
+        # Run the workflow up to competitor selection
+        initial_state = self._initial_state(company_name, location)
+        thread_id = str(uuid.uuid4())
+        config = self._run_config(thread_id)
         
-        # Run only the competitor search portion
-        nodes = CompetitorAnalysisNodes()
-        classified_state = nodes.input_classifier_node(initial_state)
+        with track_workflow("competitor_search"):
+            state = await self.workflow.ainvoke(
+                initial_state,
+                config,
+                interrupt_before=["competitor_selection"]
+            )
+        snapshot = await self.workflow.aget_state(config)
         
-        if classified_state.get("next_step") == "competitor_search":
-            # Update state with classification results
-            updated_state = {**initial_state, **classified_state}
-            search_result = nodes.competitor_search_node(updated_state)
-            return search_result.get("competitor_names", [])
+        if session_id and snapshot.next == ("competitor_selection",):
+            self._save_session_checkpoint(session_id, self._session_key(company_name, location), snapshot.config)
+        else:
+            self.checkpointer.delete_thread(thread_id)
         
-        return []
+        if state.get("error_message"):
+            return []
+        return state.get("competitor_names", [])
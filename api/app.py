@@ -0,0 +1,42 @@
+"""
+FastAPI application serving the REST API and Prometheus metrics. main.py
+mounts the Gradio UI on it; run it alone for a headless service:
+
+    uvicorn api.app:app --host 0.0.0.0 --port 7861
+"""
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from api.routes import router
+from config.config import settings
+from services.job_service import job_queue
+from services.prefetch_service import prefetcher
+from utils.metrics import registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await prefetcher.stop()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
+    app.include_router(router)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,132 @@
+"""
+REST endpoints for competitor searches and analyses. Both run as jobs:
+submission returns 202 with the job at once, and the result is polled
+from /jobs/{id} or streamed from /jobs/{id}/events as server-sent events.
+Stored reports are searched by keyword under /reports.
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+
+from config.config import settings
+from services.analyzer_services import get_report, search_reports
+from services.job_service import Job, JobQueueFull, is_website, job_queue
+
+
+router = APIRouter(prefix="/api/v1", tags=["jobs"])
+
+
+class CompetitorSearchRequest(BaseModel):
+    company: str = Field(min_length=1, description="Company name")
+    location: str = Field(default="global", description="Country or region to search in")
+
+
+class AnalysisRequest(BaseModel):
+    company: str = Field(min_length=1, description="Company name or website URL")
+    location: str = Field(default="global", description="Country or region to search in")
+    competitor: Optional[str] = Field(default=None, description="Competitor to analyze; required unless company is a URL")
+    search_job_id: Optional[str] = Field(
+        default=None, description="Finished competitor search job whose results the analysis resumes from"
+    )
+
+    @model_validator(mode="after")
+    def require_competitor(self) -> "AnalysisRequest":
+        # Without one, the workflow would run a competitor search only to discard its results
+        if not is_website(self.company.strip()) and not (self.competitor or "").strip():
+            raise ValueError("competitor is required when company is a name rather than a website URL")
+        return self
+
+
+def _submit(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        job = job_queue.submit(kind, params)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Job queue is full ({e}). Please retry in {settings.API_RETRY_AFTER} seconds.",
+            headers={"Retry-After": str(settings.API_RETRY_AFTER)}
+        )
+    return job.to_dict()
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@router.post("/competitors", status_code=202)
+async def submit_competitor_search(request: CompetitorSearchRequest) -> Dict[str, Any]:
+    """Queues a competitor search; the result lists competitor names."""
+    return _submit("competitors", {"company": request.company.strip(), "location": request.location.strip() or "global"})
+
+
+@router.post("/analyses", status_code=202)
+async def submit_analysis(request: AnalysisRequest) -> Dict[str, Any]:
+    """Queues a competitor analysis; the result holds the Markdown report."""
+    return _submit("analysis", {
+        "company": request.company.strip(),
+        "location": request.location.strip() or "global",
+        "competitor": (request.competitor or "").strip() or None,
+        "session_id": request.search_job_id,
+    })
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Current status of a job, with its result once it succeeded."""
+    return _get_job(job_id).to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancels a queued or running job."""
+    job = _get_job(job_id)
+    job_queue.cancel(job)
+    return job.to_dict()
+
+
+async def _event_stream(job: Job) -> AsyncIterator[str]:
+    async for event in job_queue.events(job, settings.API_SSE_KEEPALIVE):
+        if event is None:
+            yield ": keep-alive\n\n"
+        else:
+            name, data = event
+            yield f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    """
+    Server-sent events for a job: "status" on state changes, "report" with
+    each report delta of an analysis, and a final "done" with the result.
+    """
+    job = _get_job(job_id)
+    return StreamingResponse(
+        _event_stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/reports", tags=["reports"])
+async def find_reports(
+    q: str = Query(min_length=1, description="Words that must all appear in the report"),
+    limit: int = Query(default=20, ge=1, le=100)
+) -> Dict[str, Any]:
+    """Stored reports matching a keyword query, best matches first."""
+    return {"results": search_reports(q, limit)}
+
+
+@router.get("/reports/{report_id}", tags=["reports"])
+async def read_report(report_id: int) -> Dict[str, Any]:
+    """A stored report with its inputs' fingerprints and token usage."""
+    report = get_report(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Unknown report {report_id}")
+    return report
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+
+from config.config import settings
+from services.analyzer_services import workflow
+from services.batch_service import arun_batch, load_batch_entries
+from utils.async_utils import run_sync
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate competitor analysis reports for a CSV/JSONL list of companies or URLs."
+    )
+    parser.add_argument("input", help="CSV or JSONL file with company, location and optional competitor columns")
+    parser.add_argument("--output-dir", default="reports", help="Directory for reports (default: reports)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.BATCH_CONCURRENCY,
+        help=f"Analyses run at the same time (default: {settings.BATCH_CONCURRENCY})"
+    )
+    args = parser.parse_args()
+
+    entries = load_batch_entries(args.input)
+    summary = run_sync(arun_batch(entries, args.output_dir, args.concurrency, workflow))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Deterministic corpus of realistic HTML pages for the benchmark site servers.
+Every fictional brand has its own site, and publisher sites carry one
+article per brand for each kind of coverage the workflow searches for
+(competitor round-ups, reviews, market, financial and third-party
+coverage). Pages carry the navigation, inline scripts and styles real
+pages do, so parsing cost is representative.
+"""
+
+import random
+import re
+from typing import Dict, List
+
+
+BRANDS = [
+    "Altura", "Brightwave", "Corvana", "Dellmoor", "Everlane Labs", "Fjordic",
+    "Granitec", "Helix Motors", "Ionfield", "Juniper Grove", "Kestrel Audio",
+    "Lumora", "Mistral Works", "Northvane", "Orbitly", "Pallas Foods",
+]
+
+# Coverage kinds, matching the workflow's competitor and external data queries
+ARTICLE_KINDS = ["competitors", "reviews", "market_analysis", "financials", "third_party"]
+
+_WORDS = (
+    "market share growth customers product pricing strategy quality service "
+    "innovation brand loyalty revenue segment premium budget launch platform "
+    "retail online distribution partners supply chain sustainability design "
+    "performance reliability support warranty subscription analysts forecast "
+    "quarter margin expansion region demand adoption feature roadmap"
+).split()
+
+ROBOTS_TXT = "User-agent: *\nAllow: /\n"
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _sentence(rng: random.Random, brands: List[str]) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(10, 22))]
+    if brands and rng.random() < 0.6:
+        words.insert(rng.randrange(len(words)), rng.choice(brands))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int, brands: List[str]) -> List[str]:
+    return [" ".join(_sentence(rng, brands) for _ in range(rng.randint(3, 6))) for _ in range(count)]
+
+
+def _page(rng: random.Random, title: str, paragraphs: List[str]) -> str:
+    # Inline script and style blocks make up most of a real page's bytes
+    script = "\n".join(
+        f"window.__data_{i} = {{id: {rng.randint(0, 10**6)}, tags: {[rng.choice(_WORDS) for _ in range(8)]}}};"
+        for i in range(rng.randint(150, 300))
+    )
+    style = "\n".join(f".c{i} {{ margin: {i % 17}px; color: #{rng.randint(0, 0xFFFFFF):06x}; }}" for i in range(200))
+    nav = "".join(f'<li><a href="/{word}">{word.title()}</a></li>' for word in rng.sample(_WORDS, 12))
+    body = "\n".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{style}</style>
+<script>{script}</script>
+</head>
+<body>
+<header><nav><ul>{nav}</ul></nav></header>
+<main><article><h1>{title}</h1>
+{body}
+</article></main>
+<footer><p>Copyright {title}. All rights reserved.</p></footer>
+</body>
+</html>
+"""
+
+
+def build_brand_site(brand: str, seed: int = 0) -> Dict[str, str]:
+    """Returns path -> content for a brand's own site."""
+    rng = random.Random(f"{seed}:brand:{brand}")
+    return {
+        "/": _page(rng, f"{brand} - Official Site", _paragraphs(rng, 8, [brand])),
+        "/robots.txt": ROBOTS_TXT,
+    }
+
+
+def build_publisher_site(kind: str, index: int, seed: int = 0) -> Dict[str, str]:
+    """Returns path -> content for a publisher with one article of a kind per brand."""
+    rng = random.Random(f"{seed}:{kind}:{index}")
+    pages = {"/robots.txt": ROBOTS_TXT}
+    for brand in BRANDS:
+        others = [other for other in BRANDS if other != brand]
+        # Round-ups name many competitors; other coverage is about the brand
+        mentioned = rng.sample(others, 8) if kind == "competitors" else [brand]
+        title = f"{brand} {kind.replace('_', ' ')} {index + 1}"
+        pages[f"/{slugify(brand)}"] = _page(rng, title, _paragraphs(rng, 12, mentioned))
+    return pages
@@ -0,0 +1,393 @@
+"""
+Local stand-ins for the services the workflow calls: a Serper-compatible
+search endpoint, an OpenAI-compatible chat completions endpoint with
+configurable latency and token rate, and static sites serving the
+benchmark corpus. Each runs a threaded HTTP server on an ephemeral port
+and counts the requests it receives.
+
+The benchmark runner starts the whole stack in a child process so the
+servers do not share the measured interpreter; a control server reports
+and resets the counters. Run this module directly to start the stack on
+its own and print the settings that point the app at it.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from benchmarks.corpus import ARTICLE_KINDS, BRANDS, build_brand_site, build_publisher_site, slugify
+from utils.report_sections import REPORT_SECTIONS
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.owner.handle("GET", self)
+
+    def do_POST(self) -> None:
+        self.server.owner.handle("POST", self)
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data: Any, status: int = 200) -> None:
+        self.send_body(status, json.dumps(data).encode("utf-8"), "application/json")
+
+
+class FakeServer:
+    """Threaded HTTP server on 127.0.0.1 with request counters."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[name] += amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, request: _Handler) -> None:
+        raise NotImplementedError
+
+
+class SiteServer(FakeServer):
+    """Serves a fixed set of pages."""
+
+    def __init__(self, pages: Dict[str, str], latency: float = 0.0):
+        self.pages = {path: content.encode("utf-8") for path, content in pages.items()}
+        super().__init__(latency)
+
+    def handle(self, method: str, request: _Handler) -> None:
+        path = request.path.split("?")[0]
+        self.count("robots" if path == "/robots.txt" else "pages")
+        if self.latency:
+            time.sleep(self.latency)
+        body = self.pages.get(path)
+        if body is None:
+            request.send_body(404, b"Not found", "text/plain")
+        elif path.endswith(".txt"):
+            request.send_body(200, body, "text/plain")
+        else:
+            self.count("bytes", len(body))
+            request.send_body(200, body, "text/html; charset=utf-8")
+
+
+class Corpus:
+    """Brand and publisher sites for the whole corpus."""
+
+    def __init__(self, publishers_per_kind: int = 3, latency: float = 0.0, seed: int = 0):
+        self.brand_sites = {brand: SiteServer(build_brand_site(brand, seed), latency) for brand in BRANDS}
+        self.publishers = {
+            kind: [SiteServer(build_publisher_site(kind, i, seed), latency) for i in range(publishers_per_kind)]
+            for kind in ARTICLE_KINDS
+        }
+
+    @property
+    def servers(self) -> List[SiteServer]:
+        return list(self.brand_sites.values()) + [s for sites in self.publishers.values() for s in sites]
+
+    def reset(self) -> None:
+        for server in self.servers:
+            server.reset()
+
+    def counts(self) -> Counter:
+        total: Counter = Counter()
+        for server in self.servers:
+            total.update(server.counts)
+        return total
+
+    def close(self) -> None:
+        for server in self.servers:
+            server.close()
+
+
+def _find_brand(text: str) -> Optional[str]:
+    lowered = text.lower()
+    for brand in BRANDS:
+        if brand.lower() in lowered:
+            return brand
+    return None
+
+
+def _query_kind(query: str) -> str:
+    query = query.lower()
+    if "competitors" in query:
+        return "competitors"
+    if "review" in query:
+        return "reviews"
+    if "market" in query:
+        return "market_analysis"
+    if "financial" in query:
+        return "financials"
+    return "third_party"
+
+
+class FakeSerper(FakeServer):
+    """Serper-compatible /search endpoint returning corpus pages."""
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0):
+        self.corpus = corpus
+        super().__init__(latency)
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.url}/search"
+
+    def handle(self, method: str, request: _Handler) -> None:
+        payload = request.read_json()
+        query = payload.get("q", "")
+        self.count("requests")
+        if self.latency:
+            time.sleep(self.latency)
+
+        brand = _find_brand(query) or BRANDS[sum(map(ord, query)) % len(BRANDS)]
+        if "official website" in query.lower():
+            links = [self.corpus.brand_sites[brand].url + "/"]
+        else:
+            publishers = self.corpus.publishers[_query_kind(query)]
+            links = [f"{site.url}/{slugify(brand)}" for site in publishers]
+        organic = [
+            {"title": f"{brand} result {i + 1}", "link": link, "snippet": f"About {brand}", "position": i + 1}
+            for i, link in enumerate(links[:payload.get("num", 10)])
+        ]
+        request.send_json({"searchParameters": {"q": query}, "organic": organic})
+
+
+class FakeOpenAI(FakeServer):
+    """OpenAI-compatible /v1/chat/completions with configurable latency and token rate."""
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 200.0, output_tokens: int = 300):
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        super().__init__(latency)
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def _reply(self, body: Dict[str, Any]) -> List[str]:
+        """Returns the reply as a list of tokens."""
+        prompt = " ".join(str(message.get("content") or "") for message in body.get("messages", []))
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            lowered = prompt.lower()
+            names = [brand for brand in BRANDS if brand.lower() in lowered]
+            reply = json.dumps({"competitors": [{"name": name, "sources": [1]} for name in names]})
+            return [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        # Reports follow the section headings the prompt asks for (after "Markdown heading", so sections
+        # quoted in a synthesis prompt are not repeated); output_tokens is the length of a full report
+        asked = prompt.rsplit("Markdown heading", 1)[-1]
+        headings = re.findall(r"^\s*## (.+?)\s*$", asked, re.MULTILINE) or ["Analysis"]
+        per_section = max(1, self.output_tokens // len(REPORT_SECTIONS) - 1)
+        words = []
+        for heading in headings:
+            words.append(f"\n## {heading}\n")
+            words.extend(f"insight{i % 50} " for i in range(per_section))
+        return words
+
+    def handle(self, method: str, request: _Handler) -> None:
+        if not request.path.endswith("/chat/completions"):
+            request.send_json({"error": {"message": "Not found"}}, status=404)
+            return
+        body = request.read_json()
+        prompt_chars = sum(len(str(message.get("content") or "")) for message in body.get("messages", []))
+        tokens = self._reply(body)
+        self.count("requests")
+        self.count("prompt_tokens", prompt_chars // 4)
+        self.count("completion_tokens", len(tokens))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4o")
+
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_chars // 4 + len(tokens),
+        }
+
+        time.sleep(self.latency)
+        if not body.get("stream"):
+            time.sleep(len(tokens) / self.tokens_per_second)
+            request.send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "text/event-stream")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+
+        def send_event(data: str) -> None:
+            payload = f"data: {data}\n\n".encode("utf-8")
+            request.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+            request.wfile.flush()
+
+        # Tokens are sent in small groups to keep the event count realistic
+        group = 5
+        for i in range(0, len(tokens), group):
+            time.sleep(len(tokens[i:i + group]) / self.tokens_per_second)
+            send_event(json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": "".join(tokens[i:i + group])}, "finish_reason": None}],
+            }))
+        send_event(json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            send_event(json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }))
+        send_event("[DONE]")
+        request.wfile.write(b"0\r\n\r\n")
+        request.wfile.flush()
+
+
+class FakeStack:
+    """Corpus sites, fake Serper and fake OpenAI, started together."""
+
+    def __init__(
+        self,
+        llm_latency: float = 0.2,
+        llm_tokens_per_second: float = 200.0,
+        llm_output_tokens: int = 300,
+        serper_latency: float = 0.05,
+        site_latency: float = 0.02,
+        publishers_per_kind: int = 3
+    ):
+        self.corpus = Corpus(publishers_per_kind, site_latency)
+        self.serper = FakeSerper(self.corpus, serper_latency)
+        self.openai = FakeOpenAI(llm_latency, llm_tokens_per_second, llm_output_tokens)
+
+    def urls(self) -> Dict[str, Any]:
+        return {
+            "serper_endpoint": self.serper.endpoint,
+            "openai_base_url": self.openai.base_url,
+            "brand_sites": {brand: server.url + "/" for brand, server in self.corpus.brand_sites.items()},
+        }
+
+    def stats(self) -> Dict[str, int]:
+        sites = self.corpus.counts()
+        return {
+            "serper_requests": self.serper.counts["requests"],
+            "openai_requests": self.openai.counts["requests"],
+            "openai_prompt_tokens": self.openai.counts["prompt_tokens"],
+            "openai_completion_tokens": self.openai.counts["completion_tokens"],
+            "page_requests": sites["pages"],
+            "robots_requests": sites["robots"],
+            "page_bytes": sites["bytes"],
+        }
+
+    def reset(self) -> None:
+        self.corpus.reset()
+        self.serper.reset()
+        self.openai.reset()
+
+    def close(self) -> None:
+        self.corpus.close()
+        self.serper.close()
+        self.openai.close()
+
+
+class ControlServer(FakeServer):
+    """GET /stats returns the stack's counters; POST /reset clears them."""
+
+    def __init__(self, stack: FakeStack):
+        self.stack = stack
+        super().__init__()
+
+    def handle(self, method: str, request: _Handler) -> None:
+        if method == "POST" and request.path == "/reset":
+            request.read_json()
+            self.stack.reset()
+            request.send_json({"ok": True})
+        elif request.path == "/stats":
+            request.send_json(self.stack.stats())
+        else:
+            request.send_json({"error": "Not found"}, status=404)
+
+
+def run_stack(config: Dict[str, Any], conn: Any = None) -> None:
+    """Starts the stack and serves until the process is terminated."""
+    stack = FakeStack(**config)
+    control = ControlServer(stack)
+    urls = {**stack.urls(), "control": control.url}
+    if conn is not None:
+        conn.send(urls)
+    else:
+        print("SERPER_API_KEY=benchmark")
+        print(f"SERPER_ENDPOINT={urls['serper_endpoint']}")
+        print("OPENAI_API_KEY=benchmark")
+        print(f"OPENAI_BASE_URL={urls['openai_base_url']}")
+        print(f"# Control: {urls['control']}/stats", flush=True)
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake Serper, OpenAI and site servers.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=300, help="Length of generated reports")
+    parser.add_argument("--serper-latency", type=float, default=0.05)
+    parser.add_argument("--site-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    try:
+        run_stack(vars(args))
+    except KeyboardInterrupt:
+        pass
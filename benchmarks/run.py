@@ -0,0 +1,277 @@
+"""
+Offline benchmark of the competitor analysis workflow.
+
+Starts the fake Serper, OpenAI and site servers from benchmarks.fakes in a
+child process, points the app at them through its settings, then times
+CompetitorAnalysisWorkflow.run_analysis, get_competitors and every node in
+isolation. Results (latency percentiles, peak traced memory and upstream
+call counts per iteration) are written as JSON; with --baseline the run
+fails when a scenario regressed against an earlier result file.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fakes import run_stack
+
+
+COMPANY = "Altura"
+COMPETITOR = "Helix Motors"
+WEBSITE_BRAND = "Lumora"
+LOCATION = "Germany"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the workflow against local fake services.")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed iterations per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations per scenario")
+    parser.add_argument("--scenarios", nargs="*", help="Only run these scenarios (default: all)")
+    parser.add_argument("--warm", action="store_true",
+                        help="Enable the search, page and LLM caches and the gazetteer (default: cold path)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake OpenAI seconds before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=300, help="Length of generated reports")
+    parser.add_argument("--serper-latency", type=float, default=0.05)
+    parser.add_argument("--site-latency", type=float, default=0.02)
+    parser.add_argument("--output", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative increase in p50 latency and peak memory")
+    return parser.parse_args()
+
+
+def _configure_environment(args: argparse.Namespace, urls: Dict[str, Any], cache_dir: str) -> None:
+    """Points the app's settings at the fakes; must run before the app is imported."""
+    os.environ.update({
+        "SERPER_API_KEY": "benchmark",
+        "SERPER_ENDPOINT": urls["serper_endpoint"],
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": urls["openai_base_url"],
+        "SEARCH_CACHE_PATH": os.path.join(cache_dir, "search_cache.sqlite3"),
+        "PAGE_CACHE_PATH": os.path.join(cache_dir, "page_cache.sqlite3"),
+        "LLM_CACHE_PATH": os.path.join(cache_dir, "llm_cache.sqlite3"),
+        "DEDUP_INDEX_PATH": os.path.join(cache_dir, "dedup_index.sqlite3"),
+        "GAZETTEER_PATH": os.path.join(cache_dir, "gazetteer.sqlite3"),
+        "REPORT_STORE_PATH": os.path.join(cache_dir, "reports.sqlite3"),
+        "SEARCH_CACHE_ENABLED": str(args.warm).lower(),
+        "PAGE_CACHE_ENABLED": str(args.warm).lower(),
+        "LLM_CACHE_MODE": "on" if args.warm else "bypass",
+        "GAZETTEER_ENABLED": str(args.warm).lower(),
+    })
+    # Politeness delays and API quotas depend on the targets, not on the
+    # code under test; they are lifted unless explicitly configured
+    os.environ.setdefault("SCRAPE_MIN_DELAY_PER_HOST", "0")
+    os.environ.setdefault("SERPER_REQUESTS_PER_SECOND", "1000")
+    os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("OPENAI_TOKENS_PER_MINUTE", "100000000")
+
+
+def _control(urls: Dict[str, Any], path: str) -> Dict[str, int]:
+    data = b"{}" if path == "/reset" else None
+    with urllib.request.urlopen(urls["control"] + path, data=data, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def _build_scenarios(workflow: Any, urls: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """Returns scenario name -> callable running it once."""
+    from utils.async_utils import run_sync
+
+    nodes = workflow.nodes
+    website = urls["brand_sites"][WEBSITE_BRAND]
+
+    # Node inputs are captured once by walking the graph's path by hand
+    state = dict(workflow._initial_state(COMPANY, LOCATION, COMPETITOR))
+    state.update(nodes.input_classifier_node(state))
+    search_state = dict(state)
+    state.update(nodes.competitor_search_node(state))
+    state.update(nodes.competitor_selection_node(state))
+    collect_state = dict(state)
+    state.update(nodes.data_collection_node(state))
+    state.update(run_sync(nodes.acompany_site_node(state)))
+    sections = {}
+    for branch in (nodes.areviews_node, nodes.amarket_analysis_node, nodes.afinancials_node, nodes.athird_party_node):
+        sections.update(run_sync(branch(collect_state))["external_sections"])
+    state["external_sections"] = sections
+    state.update(nodes.data_merge_node(state))
+    website_state = dict(workflow._initial_state(website, ""))
+    website_state.update(nodes.input_classifier_node(website_state))
+
+    return {
+        "get_competitors": lambda: workflow.get_competitors(COMPANY, LOCATION),
+        "run_analysis": lambda: workflow.run_analysis(COMPANY, LOCATION, COMPETITOR),
+        "run_analysis_website": lambda: workflow.run_analysis(website, ""),
+        "node.input_classifier": lambda: nodes.input_classifier_node(search_state),
+        "node.competitor_search": lambda: nodes.competitor_search_node(search_state),
+        "node.competitor_selection": lambda: nodes.competitor_selection_node(search_state),
+        "node.website_analysis": lambda: nodes.website_analysis_node(website_state),
+        "node.data_collection": lambda: nodes.data_collection_node(collect_state),
+        "node.company_site": lambda: run_sync(nodes.acompany_site_node(collect_state)),
+        "node.reviews": lambda: run_sync(nodes.areviews_node(collect_state)),
+        "node.market_analysis": lambda: run_sync(nodes.amarket_analysis_node(collect_state)),
+        "node.financials": lambda: run_sync(nodes.afinancials_node(collect_state)),
+        "node.third_party": lambda: run_sync(nodes.athird_party_node(collect_state)),
+        "node.data_merge": lambda: nodes.data_merge_node(state),
+        "node.analysis_generation": lambda: nodes.analysis_generation_node(state),
+    }
+
+
+def _run_scenario(
+    run: Callable[[], Any],
+    urls: Dict[str, Any],
+    iterations: int,
+    warmup: int
+) -> Dict[str, Any]:
+    """Times a scenario, then repeats it once under tracemalloc for peak memory."""
+    from services.batch_service import percentile
+
+    for _ in range(warmup):
+        run()
+
+    durations: List[float] = []
+    calls: Dict[str, List[int]] = {}
+    errors = 0
+    for _ in range(iterations):
+        _control(urls, "/reset")
+        started = time.perf_counter()
+        result = run()
+        durations.append(time.perf_counter() - started)
+        if isinstance(result, dict) and result.get("error_message"):
+            errors += 1
+        for name, value in _control(urls, "/stats").items():
+            calls.setdefault(name, []).append(value)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": {
+            "min": round(min(durations), 4),
+            "mean": round(statistics.mean(durations), 4),
+            "p50": round(percentile(durations, 50), 4),
+            "p95": round(percentile(durations, 95), 4),
+            "max": round(max(durations), 4),
+        },
+        "peak_memory_kib": round(peak / 1024, 1),
+        # Mean upstream calls per iteration
+        "calls": {name: round(statistics.mean(values), 2) for name, values in calls.items()},
+        "errors": errors,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lists regressions in p50 latency, peak memory or upstream call counts."""
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        p50, previous_p50 = current["seconds"]["p50"], previous["seconds"]["p50"]
+        if p50 > previous_p50 * (1 + tolerance) and p50 - previous_p50 > 0.01:
+            regressions.append(f"{name}: p50 {previous_p50:.4f}s -> {p50:.4f}s")
+        memory, previous_memory = current["peak_memory_kib"], previous["peak_memory_kib"]
+        if memory > previous_memory * (1 + tolerance) and memory - previous_memory > 64:
+            regressions.append(f"{name}: peak memory {previous_memory:.0f} KiB -> {memory:.0f} KiB")
+        for call, count in current["calls"].items():
+            if count > previous["calls"].get(call, count):
+                regressions.append(f"{name}: {call} {previous['calls'][call]} -> {count}")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def main() -> int:
+    args = _parse_args()
+    config = {
+        "llm_latency": args.llm_latency,
+        "llm_tokens_per_second": args.llm_tokens_per_second,
+        "llm_output_tokens": args.llm_output_tokens,
+        "serper_latency": args.serper_latency,
+        "site_latency": args.site_latency,
+    }
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    fakes = context.Process(target=run_stack, args=(config, sender), daemon=True)
+    fakes.start()
+    urls = receiver.recv()
+
+    try:
+        # The app logs to stdout, which is kept for the JSON results
+        with tempfile.TemporaryDirectory(prefix="competitor-bench-") as cache_dir, \
+                contextlib.redirect_stdout(sys.stderr):
+            _configure_environment(args, urls, cache_dir)
+            # Imported only now so settings pick up the environment above
+            from agents.workflow import CompetitorAnalysisWorkflow
+
+            workflow = CompetitorAnalysisWorkflow()
+            scenarios = _build_scenarios(workflow, urls)
+            selected = args.scenarios or list(scenarios)
+            unknown = [name for name in selected if name not in scenarios]
+            if unknown:
+                print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+                return 2
+
+            results = {}
+            for name in selected:
+                print(f"⏱️ {name}", file=sys.stderr)
+                results[name] = _run_scenario(scenarios[name], urls, args.iterations, args.warmup)
+    finally:
+        fakes.terminate()
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warm": args.warm,
+            "fakes": config,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✅ No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -15,9 +17,224 @@ class Settings(BaseSettings):
     # OpenAI API key
     OPENAI_API_KEY: str = Field(default=""
                                 , env="OPENAI_API_KEY")
+    # OpenAI-compatible endpoint; empty uses the official API
+    OPENAI_BASE_URL: str = Field(default=""
+                                 , env="OPENAI_BASE_URL")
 
     # Serper API key
     SERPER_API_KEY: str = Field(default=""
                                 , env="SERPER_API_KEY")
+    SERPER_ENDPOINT: str = Field(default="https://google.serper.dev/search"
+                                 , env="SERPER_ENDPOINT")
+
+    # async workflow engine
+    MAX_CONCURRENCY: int = Field(default=8
+                                 , env="MAX_CONCURRENCY")
+    # Sessions whose competitor search checkpoint is kept for resuming analyses
+    SESSION_CHECKPOINT_LIMIT: int = Field(default=1000
+                                          , env="SESSION_CHECKPOINT_LIMIT")
+
+    # Gradio serving: queued events beyond UI_QUEUE_MAX_SIZE are rejected
+    UI_QUEUE_MAX_SIZE: int = Field(default=64
+                                   , env="UI_QUEUE_MAX_SIZE")
+    # Events of each kind running at the same time; the rest wait in the queue
+    UI_DEFAULT_CONCURRENCY_LIMIT: int = Field(default=16
+                                              , env="UI_DEFAULT_CONCURRENCY_LIMIT")
+    UI_SEARCH_CONCURRENCY_LIMIT: int = Field(default=8
+                                             , env="UI_SEARCH_CONCURRENCY_LIMIT")
+    UI_ANALYSIS_CONCURRENCY_LIMIT: int = Field(default=4
+                                               , env="UI_ANALYSIS_CONCURRENCY_LIMIT")
+    # Seconds clients are asked to wait before retrying when the queue is full
+    UI_QUEUE_RETRY_AFTER: int = Field(default=30
+                                      , env="UI_QUEUE_RETRY_AFTER")
+
+    # REST API job queue: workers running jobs, and queued jobs beyond which submissions are rejected
+    API_WORKERS: int = Field(default=4
+                             , env="API_WORKERS")
+    API_JOB_QUEUE_MAX_SIZE: int = Field(default=500
+                                        , env="API_JOB_QUEUE_MAX_SIZE")
+    # Finished jobs kept for polling; the oldest are forgotten first
+    API_JOB_RETENTION: int = Field(default=1000
+                                   , env="API_JOB_RETENTION")
+    API_RETRY_AFTER: int = Field(default=30
+                                 , env="API_RETRY_AFTER")
+    # Seconds between keep-alive comments on idle event streams
+    API_SSE_KEEPALIVE: float = Field(default=15.0
+                                     , env="API_SSE_KEEPALIVE")
+
+    # Speculative prefetch of the inputs of competitors listed by a search
+    PREFETCH_ENABLED: bool = Field(default=True
+                                   , env="PREFETCH_ENABLED")
+    PREFETCH_TOP_N: int = Field(default=3
+                                , env="PREFETCH_TOP_N")
+    # Serper searches a session may spend prefetching the results of one search (5 per competitor)
+    PREFETCH_SESSION_BUDGET: int = Field(default=15
+                                         , env="PREFETCH_SESSION_BUDGET")
+    # Competitors prefetched at once across all sessions
+    PREFETCH_CONCURRENCY: int = Field(default=2
+                                      , env="PREFETCH_CONCURRENCY")
+    PREFETCH_MAX_SESSIONS: int = Field(default=1000
+                                       , env="PREFETCH_MAX_SESSIONS")
+
+    # Shared HTTP transport for scraping, Serper and OpenAI
+    HTTP_MAX_CONNECTIONS: int = Field(default=100
+                                      , env="HTTP_MAX_CONNECTIONS")
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=40
+                                                , env="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    # Seconds an idle connection is kept open for reuse
+    HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0
+                                         , env="HTTP_KEEPALIVE_EXPIRY")
+    # Only takes effect when the h2 package is installed
+    HTTP2_ENABLED: bool = Field(default=True
+                                , env="HTTP2_ENABLED")
+    # Seconds resolved host addresses are reused; 0 disables the DNS cache
+    HTTP_DNS_CACHE_TTL: int = Field(default=300
+                                    , env="HTTP_DNS_CACHE_TTL")
+
+    # Serper search cache
+    SEARCH_CACHE_ENABLED: bool = Field(default=True
+                                       , env="SEARCH_CACHE_ENABLED")
+    SEARCH_CACHE_PATH: str = Field(default=".cache/search_cache.sqlite3"
+                                   , env="SEARCH_CACHE_PATH")
+    SEARCH_CACHE_MEMORY_SIZE: int = Field(default=512
+                                          , env="SEARCH_CACHE_MEMORY_SIZE")
+    SEARCH_CACHE_MAX_ENTRIES: int = Field(default=10000
+                                          , env="SEARCH_CACHE_MAX_ENTRIES")
+    # TTL in seconds per query type
+    SEARCH_CACHE_TTLS: Dict[str, int] = Field(default={
+        "official_website": 30 * 86400,
+        "competitors": 7 * 86400,
+        "reviews": 86400,
+        "market_analysis": 3 * 86400,
+        "financials": 86400,
+        "third_party": 7 * 86400,
+        "default": 86400,
+    }, env="SEARCH_CACHE_TTLS")
+
+    # Scraped page cache
+    PAGE_CACHE_ENABLED: bool = Field(default=True
+                                     , env="PAGE_CACHE_ENABLED")
+    PAGE_CACHE_PATH: str = Field(default=".cache/page_cache.sqlite3"
+                                 , env="PAGE_CACHE_PATH")
+    # Seconds a page is served without revalidation
+    PAGE_CACHE_MAX_AGE: int = Field(default=6 * 3600
+                                    , env="PAGE_CACHE_MAX_AGE")
+    PAGE_CACHE_MAX_BYTES: int = Field(default=50 * 1024 * 1024
+                                      , env="PAGE_CACHE_MAX_BYTES")
+
+    # LLM response cache: "on", "refresh" (skip reads, store new responses) or "bypass"
+    LLM_CACHE_MODE: str = Field(default="on"
+                                , env="LLM_CACHE_MODE")
+    LLM_CACHE_PATH: str = Field(default=".cache/llm_cache.sqlite3"
+                                , env="LLM_CACHE_PATH")
+    LLM_CACHE_TTL: int = Field(default=7 * 86400
+                               , env="LLM_CACHE_TTL")
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=5000
+                                       , env="LLM_CACHE_MAX_ENTRIES")
+
+    # Finished reports, kept for serving repeat requests and keyword search
+    REPORT_STORE_ENABLED: bool = Field(default=True
+                                       , env="REPORT_STORE_ENABLED")
+    REPORT_STORE_PATH: str = Field(default="data/reports.sqlite3"
+                                   , env="REPORT_STORE_PATH")
+    REPORT_STORE_MAX_ENTRIES: int = Field(default=10000
+                                          , env="REPORT_STORE_MAX_ENTRIES")
+    # Seconds a stored report is served instead of re-running the analysis; 0 always re-runs
+    REPORT_FRESHNESS_SECONDS: int = Field(default=24 * 3600
+                                          , env="REPORT_FRESHNESS_SECONDS")
+    # Older stored reports are refreshed by regenerating only sections whose sources changed
+    REPORT_INCREMENTAL_REFRESH: bool = Field(default=True
+                                             , env="REPORT_INCREMENTAL_REFRESH")
+    # Stored reports older than this are regenerated in full
+    REPORT_INCREMENTAL_MAX_AGE: int = Field(default=30 * 86400
+                                            , env="REPORT_INCREMENTAL_MAX_AGE")
+
+    # Page scraping
+    SCRAPE_MAX_BYTES: int = Field(default=512 * 1024
+                                  , env="SCRAPE_MAX_BYTES")
+    # Paragraph text kept per page
+    SCRAPE_MAX_CHARS: int = Field(default=2000
+                                  , env="SCRAPE_MAX_CHARS")
+    # Per-host politeness
+    SCRAPE_MAX_CONNECTIONS_PER_HOST: int = Field(default=2
+                                                 , env="SCRAPE_MAX_CONNECTIONS_PER_HOST")
+    SCRAPE_MIN_DELAY_PER_HOST: float = Field(default=0.5
+                                             , env="SCRAPE_MIN_DELAY_PER_HOST")
+    SCRAPE_RESPECT_ROBOTS: bool = Field(default=True
+                                        , env="SCRAPE_RESPECT_ROBOTS")
+    # Upper bound on a robots.txt Crawl-delay we are willing to wait
+    SCRAPE_MAX_CRAWL_DELAY: float = Field(default=10.0
+                                          , env="SCRAPE_MAX_CRAWL_DELAY")
+    ROBOTS_CACHE_TTL: int = Field(default=86400
+                                  , env="ROBOTS_CACHE_TTL")
+
+    # Batch runner
+    BATCH_CONCURRENCY: int = Field(default=4
+                                   , env="BATCH_CONCURRENCY")
+
+    # Upstream rate limits and retry backoff
+    SERPER_REQUESTS_PER_SECOND: float = Field(default=5.0
+                                              , env="SERPER_REQUESTS_PER_SECOND")
+    OPENAI_REQUESTS_PER_MINUTE: float = Field(default=500.0
+                                              , env="OPENAI_REQUESTS_PER_MINUTE")
+    OPENAI_TOKENS_PER_MINUTE: float = Field(default=30000.0
+                                            , env="OPENAI_TOKENS_PER_MINUTE")
+    # Output tokens assumed for a request without max_tokens
+    OPENAI_EXPECTED_OUTPUT_TOKENS: int = Field(default=1000
+                                               , env="OPENAI_EXPECTED_OUTPUT_TOKENS")
+    RETRY_MAX_ATTEMPTS: int = Field(default=4
+                                    , env="RETRY_MAX_ATTEMPTS")
+    RETRY_BASE_DELAY: float = Field(default=1.0
+                                    , env="RETRY_BASE_DELAY")
+    RETRY_MAX_DELAY: float = Field(default=30.0
+                                   , env="RETRY_MAX_DELAY")
+
+    # Page text packed into one competitor-name extraction request
+    EXTRACTION_BATCH_MAX_CHARS: int = Field(default=24000
+                                            , env="EXTRACTION_BATCH_MAX_CHARS")
+
+    # Report prompt: token budget shared by the scraped sources, and their relative weights
+    REPORT_PROMPT_TOKEN_BUDGET: int = Field(default=3000
+                                            , env="REPORT_PROMPT_TOKEN_BUDGET")
+    REPORT_PROMPT_SOURCE_WEIGHTS: Dict[str, float] = Field(default={
+        "company": 3.0,
+        "reviews": 2.0,
+        "market_analysis": 2.0,
+        "financials": 1.5,
+        "third_party": 1.5,
+        "external": 4.0,
+    }, env="REPORT_PROMPT_SOURCE_WEIGHTS")
+    # "single": one completion writes the whole report; "parallel": one completion
+    # per section, given only its sources, then a synthesis pass for the takeaways
+    REPORT_GENERATION_MODE: str = Field(default="single"
+                                        , env="REPORT_GENERATION_MODE")
+    # Token budget for the sources of one section in parallel mode
+    REPORT_SECTION_PROMPT_TOKEN_BUDGET: int = Field(default=1200
+                                                    , env="REPORT_SECTION_PROMPT_TOKEN_BUDGET")
+
+    # Near-duplicate detection of scraped pages
+    DEDUP_ENABLED: bool = Field(default=True
+                                , env="DEDUP_ENABLED")
+    DEDUP_INDEX_PATH: str = Field(default=".cache/dedup_index.sqlite3"
+                                  , env="DEDUP_INDEX_PATH")
+    # Largest SimHash Hamming distance (of 64 bits) treated as a duplicate
+    DEDUP_MAX_DISTANCE: int = Field(default=6
+                                    , env="DEDUP_MAX_DISTANCE")
+
+    # Brand gazetteer consulted before LLM competitor-name extraction
+    GAZETTEER_ENABLED: bool = Field(default=True
+                                    , env="GAZETTEER_ENABLED")
+    GAZETTEER_SEED_PATH: str = Field(default="config/brands.txt"
+                                     , env="GAZETTEER_SEED_PATH")
+    GAZETTEER_PATH: str = Field(default=".cache/gazetteer.sqlite3"
+                                , env="GAZETTEER_PATH")
+    # Fewer distinct brands than this falls back to the LLM
+    GAZETTEER_MIN_BRANDS: int = Field(default=5
+                                      , env="GAZETTEER_MIN_BRANDS")
+    # Learned names are matched once extracted this often, until unseen for GAZETTEER_MAX_AGE seconds
+    GAZETTEER_MIN_SIGHTINGS: int = Field(default=3
+                                         , env="GAZETTEER_MIN_SIGHTINGS")
+    GAZETTEER_MAX_AGE: int = Field(default=90 * 86400
+                                   , env="GAZETTEER_MAX_AGE")
 
 settings = Settings()
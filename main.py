@@ -2,8 +2,14 @@
 # filepath: /Users/braincraft/Desktop/demo-fp/multi-agent-competitor-analyzer/main.py
 import gradio as gr
 import pycountry
+import uvicorn
+from fastapi import Request
+from fastapi.responses import JSONResponse
 
-from services.analyzer_services import generate_competitor_analysis_service, update_competitor_dropdown
+from api.app import app
+from config.config import settings
+from services.analyzer_services import astream_competitor_analysis_service, aupdate_competitor_dropdown
+from services.prefetch_service import prefetcher
 
 
 def get_country_names():
@@ -21,7 +27,7 @@ def is_url(input_str):
     return input_str.startswith(("http://", "https://", "www."))
 
 
-def search_competitors(company_input, location_input, progress=gr.Progress()):
+async def search_competitors(company_input, location_input, request: gr.Request, progress=gr.Progress()):
     """Search for competitors and update dropdown"""
     if not company_input.strip():
         return (
@@ -44,10 +50,12 @@ def search_competitors(company_input, location_input, progress=gr.Progress()):
     progress(0.3, desc="Searching web for competitors...")
     
     try:
-        competitors = update_competitor_dropdown(company_input, location_input)
+        competitors = await aupdate_competitor_dropdown(company_input, location_input, request.session_hash)
         progress(0.8, desc="Processing competitor data...")
         
         if competitors:
+            # Warm the top competitors' inputs while the user is choosing
+            prefetcher.schedule(request.session_hash, competitors)
             progress(1.0, desc="Competitor search complete!")
             success_msg = "<p style='color: green;'>Found " + str(len(competitors)) + " competitors for " + company_input + " in " + location_input + "</p>"
             return (
@@ -75,10 +83,11 @@ def search_competitors(company_input, location_input, progress=gr.Progress()):
         )
 
 
-def analyze_competitor(company_input, location_input, selected_competitor, progress=gr.Progress()):
-    """Generate competitor analysis"""
+async def analyze_competitor(company_input, location_input, selected_competitor, request: gr.Request, progress=gr.Progress()):
+    """Generate competitor analysis, rendering the report as it streams in"""
     if not company_input.strip():
-        return gr.Textbox(value="Please enter a product or company name or website URL", visible=True)
+        yield gr.Textbox(value="Please enter a product or company name or website URL", visible=True)
+        return
     
     if is_url(company_input):
         # Direct URL analysis
@@ -86,17 +95,18 @@ def analyze_competitor(company_input, location_input, selected_competitor, progr
         progress(0.3, desc="Extracting website data...")
         progress(0.6, desc="Generating AI insights...")
         try:
-            analysis = generate_competitor_analysis_service(company_input, "")
+            async for analysis in astream_competitor_analysis_service(company_input, ""):
+                yield gr.Textbox(value=analysis, visible=True)
             progress(1.0, desc="Website analysis complete!")
-            return gr.Textbox(value=analysis, visible=True)
         except Exception as e:
             progress(1.0, desc="Analysis failed")
             error_msg = "Error analyzing website: " + str(e)
-            return gr.Textbox(value=error_msg, visible=True)
+            yield gr.Textbox(value=error_msg, visible=True)
     else:
         # Competitor analysis
         if not selected_competitor:
-            return gr.Textbox(value="Please select a competitor from the dropdown", visible=True)
+            yield gr.Textbox(value="Please select a competitor from the dropdown", visible=True)
+            return
         
         progress(0.1, desc="Initializing competitor research...")
         progress(0.3, desc="Gathering competitor data...")
@@ -105,17 +115,20 @@ def analyze_competitor(company_input, location_input, selected_competitor, progr
         progress(0.9, desc="Finalizing report...")
         
         try:
-            analysis = generate_competitor_analysis_service(company_input, selected_competitor)
+            async for analysis in astream_competitor_analysis_service(
+                company_input, selected_competitor, location_input, request.session_hash
+            ):
+                yield gr.Textbox(value=analysis, visible=True)
             progress(1.0, desc="Competitor analysis complete!")
-            return gr.Textbox(value=analysis, visible=True)
         except Exception as e:
             progress(1.0, desc="Analysis failed")
             error_msg = "Error generating analysis: " + str(e)
-            return gr.Textbox(value=error_msg, visible=True)
+            yield gr.Textbox(value=error_msg, visible=True)
 
 
-def on_competitor_select(selected_competitor):
+async def on_competitor_select(selected_competitor, request: gr.Request):
     """Handle competitor selection and enable analyze button"""
+    prefetcher.focus(request.session_hash, selected_competitor)
     if selected_competitor:
         return gr.Button(interactive=True, value="Generate Analysis")
     else:
@@ -274,7 +287,9 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css, title="🏢 AI Competitor
     search_btn.click(
         search_competitors,
         inputs=[company_input, location_input],
-        outputs=[competitor_dropdown, status_message, search_btn, analyze_btn]
+        outputs=[competitor_dropdown, status_message, search_btn, analyze_btn],
+        concurrency_limit=settings.UI_SEARCH_CONCURRENCY_LIMIT,
+        concurrency_id="search"
     )
     
     # Enable analyze button when competitor is selected
@@ -287,7 +302,9 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css, title="🏢 AI Competitor
     analyze_btn.click(
         analyze_competitor,
         inputs=[company_input, location_input, competitor_dropdown],
-        outputs=[analysis_output]
+        outputs=[analysis_output],
+        concurrency_limit=settings.UI_ANALYSIS_CONCURRENCY_LIMIT,
+        concurrency_id="analysis"
     )
     
     clear_btn.click(
@@ -296,14 +313,35 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css, title="🏢 AI Competitor
     )
 
 
+# Bounded queue: events beyond max_size are rejected instead of piling up
+iface.queue(max_size=settings.UI_QUEUE_MAX_SIZE, default_concurrency_limit=settings.UI_DEFAULT_CONCURRENCY_LIMIT)
+
+
+@app.middleware("http")
+async def queue_back_pressure(request: Request, call_next):
+    """Turns Gradio's queue-full rejection into an explicit retry response"""
+    response = await call_next(request)
+    if response.status_code == 503 and request.url.path.endswith("/queue/join"):
+        return JSONResponse(
+            status_code=503,
+            content={
+                "detail": "The analyzer is at capacity right now. Please try again in "
+                          f"{settings.UI_QUEUE_RETRY_AFTER} seconds."
+            },
+            headers={"Retry-After": str(settings.UI_QUEUE_RETRY_AFTER)}
+        )
+    return response
+
+
+# Serve the UI next to the REST API and Prometheus metrics of api.app
+app = gr.mount_gradio_app(app, iface, path="", show_api=False)
+
+
 if __name__ == "__main__":
     print("🚀 Launching AI Competitor Analyzer...")
     print("📍 Interface will be available at: http://localhost:7861")
+    print("🔌 REST API docs are at: http://localhost:7861/docs")
+    print("📈 Metrics are exposed at: http://localhost:7861/metrics")
     print("💡 Use Ctrl+C to stop the server")
     
-    iface.launch(
-        server_port=7861,
-        server_name="0.0.0.0",
-        show_api=False,
-        share=False
-    )
+    uvicorn.run(app, host="0.0.0.0", port=7861)
@@ -1,57 +1,250 @@
-from typing import Optional, List
+import time
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, List, Tuple
 
 from agents.workflow import CompetitorAnalysisWorkflow
+from config.config import settings
+from services.prefetch_service import prefetcher
 from utils.agent_utils import log_thought
+from utils.async_utils import run_sync
+from utils.metrics import COALESCED_REQUESTS, record_cache
+from utils.report_store import report_store
+from utils.single_flight import SingleFlight
 
 
 # Initialize the LangGraph workflow
 workflow = CompetitorAnalysisWorkflow()
 
 
+def _on_join(key: Hashable) -> None:
+    log_thought(f"🔗 Joining in-flight {key[0]} for {', '.join(part for part in key[1:] if part)}")
+    COALESCED_REQUESTS.inc(operation=key[0])
+
+
+# Identical concurrent requests share one workflow execution
+flights = SingleFlight(on_join=_on_join)
+
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).lower()
+
+
+def _lookup_report(
+    company_name_or_website: str,
+    selected_competitor: Optional[str],
+    location: str
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Returns a stored report within the freshness window to serve as is, or
+    else the newest stored report to refresh incrementally, if any.
+    """
+    stored = report_store.latest(company_name_or_website, selected_competitor, location) if report_store else None
+    age = time.time() - stored["created_at"] if stored else None
+    is_fresh = age is not None and age < settings.REPORT_FRESHNESS_SECONDS
+    record_cache("report", is_fresh)
+    if is_fresh:
+        log_thought(f"🗄️ Serving stored report #{stored['id']} from {age / 60:.0f} minutes ago")
+        return stored["report"], None
+    if stored and settings.REPORT_INCREMENTAL_REFRESH and age < settings.REPORT_INCREMENTAL_MAX_AGE:
+        log_thought(f"♻️ Refreshing stored report #{stored['id']} from {age / 3600:.1f} hours ago")
+        return None, {
+            "id": stored["id"],
+            "report": stored["report"],
+            "section_fingerprints": stored["section_fingerprints"],
+        }
+    return None, None
+
+
+def _store_report(
+    company_name_or_website: str,
+    selected_competitor: Optional[str],
+    location: str,
+    state: Dict[str, Any]
+) -> None:
+    """Keeps a successfully generated report; mock reports are not stored."""
+    if not report_store or not settings.OPENAI_API_KEY:
+        return
+    if state.get("error_message") or not state.get("analysis_report"):
+        return
+    try:
+        report_id = report_store.save(company_name_or_website, selected_competitor, location, state)
+        log_thought(f"🗄️ Stored report #{report_id} ({state.get('token_usage', {}).get('total_tokens', 0)} tokens)")
+    except Exception as e:
+        log_thought(f"⚠️ Could not store report: {e}")
+
+
+def search_reports(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Keyword search over stored reports."""
+    return report_store.search(query, limit) if report_store else []
+
+
+def get_report(report_id: int) -> Optional[Dict[str, Any]]:
+    """Returns a stored report by id."""
+    return report_store.get(report_id) if report_store else None
+
+
 def generate_competitor_analysis_service(
     company_name_or_website: str,
-    selected_competitor: Optional[str] = None
+    selected_competitor: Optional[str] = None,
+    location: str = "global",
+    session_id: Optional[str] = None
 ) -> str:
     """Generate analysis report using LangGraph workflow."""
-    log_thought("🚀 Starting LangGraph-based competitor analysis...")
+    return run_sync(agenerate_competitor_analysis_service(
+        company_name_or_website, selected_competitor, location, session_id
+    ))
+
+
+async def agenerate_competitor_analysis_service(
+    company_name_or_website: str,
+    selected_competitor: Optional[str] = None,
+    location: str = "global",
+    session_id: Optional[str] = None
+) -> str:
+    """Async version of generate_competitor_analysis_service; shares runs with streamed requests."""
+    report = "No analysis generated"
+    async for report in astream_competitor_analysis_service(
+        company_name_or_website, selected_competitor, location, session_id
+    ):
+        pass
+    return report
+
+
+class AnalysisFailed(RuntimeError):
+    """The workflow finished with an error instead of a report."""
+
+
+async def _astream_report(
+    company_name_or_website: str,
+    selected_competitor: Optional[str],
+    location: str,
+    session_id: Optional[str],
+    previous_report: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """Runs the workflow once, yielding the report so far and raising on errors."""
+    log_thought("🚀 Starting streamed LangGraph-based competitor analysis...")
+    
+    report = ""
+    async for event in workflow.astream_analysis(
+        company_name_or_website=company_name_or_website,
+        location=location or "global",
+        selected_competitor=selected_competitor,
+        session_id=session_id,
+        previous_report=previous_report
+    ):
+        if event["type"] == "chunk":
+            report += event["text"]
+            yield report
+        elif event["state"].get("error_message"):
+            raise AnalysisFailed(event["state"]["error_message"])
+        else:
+            _store_report(company_name_or_website, selected_competitor, location, event["state"])
+            if not report:
+                report = event["state"].get("analysis_report") or ""
+                if not report:
+                    raise AnalysisFailed("No analysis generated")
+                yield report
+
+
+async def astream_analysis_report(
+    company_name_or_website: str,
+    selected_competitor: Optional[str] = None,
+    location: str = "global",
+    session_id: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the analysis report, yielding the text generated so far and
+    raising AnalysisFailed when the workflow fails.
     
+    A stored report within the freshness window is returned at once; an
+    older one is refreshed section by section. Concurrent requests for the
+    same company, competitor and location, from the UI or the REST API,
+    attach to one workflow run and receive the same streamed report.
+    """
+    # Prefetches of the competitors not picked would be wasted
+    prefetcher.focus(session_id, selected_competitor, start=False)
+    stored, previous_report = _lookup_report(company_name_or_website, selected_competitor, location)
+    if stored is not None:
+        yield stored
+        return
+    key = (
+        "analysis",
+        _normalize(company_name_or_website),
+        _normalize(selected_competitor),
+        _normalize(location or "global")
+    )
+    async for report in flights.stream(key, lambda: _astream_report(
+        company_name_or_website, selected_competitor, location, session_id, previous_report
+    )):
+        yield report
+
+
+async def astream_competitor_analysis_service(
+    company_name_or_website: str,
+    selected_competitor: Optional[str] = None,
+    location: str = "global",
+    session_id: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Stream the analysis report for the UI, ending with error text instead of raising."""
     try:
-        # Run the LangGraph workflow
-        final_state = workflow.run_analysis(
-            company_name_or_website=company_name_or_website,
-            location="global",  # Default location
-            selected_competitor=selected_competitor
-        )
-        
-        # Check for errors
-        if final_state.get("error_message"):
-            return final_state["error_message"]
-        
-        # Return the analysis report
-        return final_state.get("analysis_report", "No analysis generated")
-        
+        async for report in astream_analysis_report(
+            company_name_or_website, selected_competitor, location, session_id
+        ):
+            yield report
+    except AnalysisFailed as e:
+        yield str(e)
     except Exception as e:
         log_thought(f"❌ Error in LangGraph workflow: {e}")
-        return f"Error generating analysis: {str(e)}"
+        yield f"Error generating analysis: {str(e)}"
+
+
+async def _afetch_competitors(
+    company_name: str,
+    location: str,
+    session_id: Optional[str]
+) -> Tuple[List[str], Optional[str]]:
+    """Runs the competitor search, returning the competitors and the session it was checkpointed for."""
+    competitors = await workflow.aget_competitors(
+        company_name=company_name,
+        location=location or "global",
+        session_id=session_id
+    )
+    return competitors, session_id
 
 
 def update_competitor_dropdown(
-    company_name: str, 
-    location: str
+    company_name: str,
+    location: str,
+    session_id: Optional[str] = None
 ) -> List[str]:
     """Fetch and return competitors for dropdown using LangGraph workflow."""
+    return run_sync(aupdate_competitor_dropdown(company_name, location, session_id))
+
+
+async def aupdate_competitor_dropdown(
+    company_name: str,
+    location: str,
+    session_id: Optional[str] = None
+) -> List[str]:
+    """
+    Async version of update_competitor_dropdown.
+    
+    Concurrent searches for the same company and location share one
+    workflow run; every session can then resume its analysis from the
+    shared search checkpoint.
+    """
     log_thought("🔍 Fetching competitors using LangGraph workflow...")
     
     try:
-        # Use the workflow to get competitors
-        competitors = workflow.get_competitors(
-            company_name=company_name,
-            location=location or "global"
+        key = ("competitors", _normalize(company_name), _normalize(location or "global"))
+        competitors, searched_session_id = await flights.run(
+            key, lambda: _afetch_competitors(company_name, location, session_id)
         )
+        if session_id and searched_session_id:
+            workflow.share_session_checkpoint(searched_session_id, session_id)
         
         log_thought(f"✅ Found {len(competitors)} competitors")
-        return competitors
-        
+        return list(competitors)
+    
     except Exception as e:
         log_thought(f"❌ Error fetching competitors: {e}")
         return []
@@ -0,0 +1,165 @@
+import asyncio
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from agents.workflow import CompetitorAnalysisWorkflow
+from utils.agent_utils import log_thought
+
+
+def load_batch_entries(path: str) -> List[Dict[str, str]]:
+    """
+    Loads batch entries from a CSV or JSONL file.
+
+    Every entry needs a "company" (name or website URL) and may set a
+    "location" (default: global) and a "competitor" to analyze. When no
+    competitor is given for a company name, the company itself is analyzed.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    entries = []
+    for row in rows:
+        company = (row.get("company") or row.get("url") or "").strip()
+        if not company:
+            continue
+        entries.append({
+            "company": company,
+            "location": (row.get("location") or "global").strip(),
+            "competitor": (row.get("competitor") or "").strip(),
+        })
+    return entries
+
+
+def entry_id(entry: Dict[str, str]) -> str:
+    """Stable file-safe id for an entry, used to skip completed work on restart."""
+    raw = json.dumps([entry["company"].lower(), entry["location"].lower(), entry["competitor"].lower()])
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:10]
+    label = entry["competitor"] or entry["company"]
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")[:40]
+    return f"{slug}-{digest}"
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _analyze_entry(workflow: CompetitorAnalysisWorkflow, entry: Dict[str, str]) -> Dict[str, Any]:
+    """Runs the workflow for one entry."""
+    company = entry["company"]
+    is_website = company.startswith(("http://", "https://", "www."))
+    selected_competitor = None if is_website else (entry["competitor"] or company)
+    return await workflow.arun_analysis(
+        company_name_or_website=company,
+        location=entry["location"],
+        selected_competitor=selected_competitor
+    )
+
+
+def _write_report(path: str, report: str) -> None:
+    """Writes a report atomically so partial files never look completed."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(report)
+    os.replace(tmp_path, path)
+
+
+async def arun_batch(
+    entries: List[Dict[str, str]],
+    output_dir: str,
+    concurrency: int,
+    workflow: CompetitorAnalysisWorkflow
+) -> Dict[str, Any]:
+    """
+    Analyzes entries with a bounded worker pool, writing each report as it completes.
+
+    Args:
+        entries: Entries from load_batch_entries
+        output_dir: Directory for <entry id>.md reports and results.jsonl
+        concurrency: Number of analyses run at the same time
+        workflow: Workflow used for every analysis
+
+    Returns:
+        Throughput summary for the run
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+
+    queue: "asyncio.Queue[Dict[str, str]]" = asyncio.Queue()
+    skipped = 0
+    for entry in entries:
+        if os.path.exists(os.path.join(output_dir, f"{entry_id(entry)}.md")):
+            skipped += 1
+        else:
+            queue.put_nowait(entry)
+    log_thought(f"📦 Batch: {queue.qsize()} to analyze, {skipped} already done")
+
+    durations: List[float] = []
+    failed = 0
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        nonlocal failed
+        while True:
+            try:
+                entry = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            report_id = entry_id(entry)
+            entry_started = time.perf_counter()
+            error = None
+            try:
+                final_state = await _analyze_entry(workflow, entry)
+                error = final_state.get("error_message")
+                report = final_state.get("analysis_report", "")
+                if not error and not report:
+                    error = "No analysis generated"
+                if not error:
+                    _write_report(os.path.join(output_dir, f"{report_id}.md"), report)
+            except Exception as e:
+                error = str(e)
+            duration = time.perf_counter() - entry_started
+
+            if error:
+                failed += 1
+                log_thought(f"❌ Batch entry {report_id} failed: {error}")
+            else:
+                durations.append(duration)
+                log_thought(f"✅ Batch entry {report_id} done in {duration:.1f}s")
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "id": report_id,
+                    **entry,
+                    "seconds": round(duration, 3),
+                    "error": error,
+                    "finished_at": time.time(),
+                }) + "\n")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    elapsed = time.perf_counter() - started
+    p50 = percentile(durations, 50)
+    p95 = percentile(durations, 95)
+    return {
+        "total": len(entries),
+        "completed": len(durations),
+        "failed": failed,
+        "skipped": skipped,
+        "elapsed_seconds": round(elapsed, 3),
+        "reports_per_minute": round(len(durations) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "p50_seconds": round(p50, 3) if p50 is not None else None,
+        "p95_seconds": round(p95, 3) if p95 is not None else None,
+    }
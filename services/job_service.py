@@ -0,0 +1,246 @@
+"""
+Job queue behind the REST API. Submitting a competitor search or an
+analysis returns a job at once; a bounded pool of workers on the server's
+event loop runs the workflow. Clients poll the job or subscribe to its
+events (status changes and report deltas) as server-sent events.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config.config import settings
+from services.analyzer_services import astream_analysis_report, aupdate_competitor_dropdown
+from services.prefetch_service import prefetcher
+from utils.agent_utils import log_thought
+from utils.metrics import API_JOBS, API_JOBS_QUEUED
+
+
+JOB_KINDS = ("competitors", "analysis")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+# (event name, data) pairs; None asks the stream to send a keep-alive
+JobEvent = Optional[Tuple[str, Dict[str, Any]]]
+
+
+def is_website(company: str) -> bool:
+    """Whether an analysis targets a website URL rather than a named competitor."""
+    return company.startswith(("http://", "https://", "www."))
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """One submitted search or analysis and its progress."""
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Report generated so far, for analyses
+        self.report = ""
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobQueue:
+    """Bounded queue of jobs executed by a fixed number of workers."""
+
+    def __init__(self, workers: int, max_size: int, retention: int):
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.retention = retention
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Starts the workers on the running loop; later calls are no-ops."""
+        if self._worker_tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=max(0, self.max_size))
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        log_thought(f"🧵 API job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Cancels the workers along with running jobs; queued jobs are cancelled too."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        for job in self._jobs.values():
+            if job.status == "queued":
+                self._finish(job, "cancelled", error="Server shutting down")
+        self._queue = None
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """Queues a job, raising JobQueueFull when the queue is at capacity."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        job = Job(kind, params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.pending()} jobs are already queued") from None
+        API_JOBS_QUEUED.inc(kind=kind)
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job: Job) -> None:
+        """Cancels a queued or running job; finished jobs are left alone."""
+        if job.status == "queued":
+            API_JOBS_QUEUED.dec(kind=job.kind)
+            self._finish(job, "cancelled", error="Cancelled")
+        elif job.status == "running" and job.task is not None:
+            job.task.cancel()
+
+    async def events(self, job: Job, keepalive: float) -> AsyncIterator[JobEvent]:
+        """
+        Yields the job's status and the report so far, then every later
+        event until the job finishes; None after keepalive idle seconds.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        job.subscribers.append(queue)
+        try:
+            yield "status", job.to_dict(include_result=False)
+            if job.report:
+                yield "report", {"text": job.report}
+            if job.finished:
+                yield "done", job.to_dict()
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event[0] == "done":
+                    return
+        finally:
+            job.subscribers.remove(queue)
+
+    def _publish(self, job: Job, event: str, data: Dict[str, Any]) -> None:
+        for queue in job.subscribers:
+            queue.put_nowait((event, data))
+
+    def _finish(self, job: Job, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        API_JOBS.inc(kind=job.kind, status=status)
+        self._publish(job, "done", job.to_dict())
+
+    def _evict(self) -> None:
+        """Forgets the oldest finished jobs beyond the retention limit."""
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.finished:
+                # Cancelled while queued
+                continue
+            API_JOBS_QUEUED.dec(kind=job.kind)
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                # wait() leaves job.task alone when the job itself is cancelled
+                await asyncio.wait({job.task})
+            except asyncio.CancelledError:
+                job.task.cancel()
+                raise
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._publish(job, "status", job.to_dict(include_result=False))
+        log_thought(f"🧵 API job {job.id} ({job.kind}) started")
+        try:
+            if job.kind == "competitors":
+                result = await self._search(job)
+            else:
+                result = await self._analyze(job)
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled", error="Cancelled")
+        except Exception as e:
+            log_thought(f"❌ API job {job.id} failed: {e}")
+            self._finish(job, "failed", error=str(e))
+        else:
+            self._finish(job, "succeeded", result=result)
+            log_thought(f"✅ API job {job.id} finished in {job.finished_at - job.started_at:.1f}s")
+
+    async def _search(self, job: Job) -> Dict[str, Any]:
+        # The job id doubles as the session, so analyses can resume from this search
+        competitors = await aupdate_competitor_dropdown(
+            job.params["company"], job.params["location"], session_id=job.id
+        )
+        # Analyses passing this job as their search usually pick one of the first competitors
+        prefetcher.schedule(job.id, competitors)
+        return {"competitors": competitors, "session_id": job.id}
+
+    async def _analyze(self, job: Job) -> Dict[str, Any]:
+        company = job.params["company"]
+        # Names always come with a competitor (the route requires it), so no competitor search runs
+        selected_competitor = None if is_website(company) else job.params.get("competitor")
+        async for report in astream_analysis_report(
+            company, selected_competitor, job.params["location"], job.params.get("session_id")
+        ):
+            if report.startswith(job.report):
+                delta = {"text": report[len(job.report):]}
+            else:
+                delta = {"text": report, "replace": True}
+            job.report = report
+            if delta["text"]:
+                self._publish(job, "report", delta)
+        return {"report": job.report}
+
+
+# Shared by the REST API routes
+job_queue = JobQueue(
+    workers=settings.API_WORKERS,
+    max_size=settings.API_JOB_QUEUE_MAX_SIZE,
+    retention=settings.API_JOB_RETENTION
+)
@@ -0,0 +1,175 @@
+"""
+Speculative prefetch of competitor inputs. After a competitor search the
+user takes a few seconds to pick a competitor; meanwhile the website
+lookup, homepage scrape and external source lookups of the top listed
+competitors run in the background, so the analysis finds them in the
+search and page caches (or joins them while still in flight).
+
+Prefetches are low priority: they only start network calls while the
+shared concurrency limit has a free slot, a session spends at most its
+budget of searches on the competitors of each search, and they are
+cancelled once the session picks a competitor or searches again.
+"""
+
+import asyncio
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config.config import settings
+from utils.agent_utils import (
+    EXTERNAL_DATA_QUERIES,
+    aextract_company_info,
+    aget_company_website,
+    asearch_external_source,
+    log_thought,
+)
+from utils.async_utils import concurrency_limit
+from utils.metrics import PREFETCHES
+from utils.page_cache import page_cache
+from utils.serper_search import search_tool
+
+
+# Serper searches per prefetched competitor: the website and every external source
+SEARCHES_PER_COMPETITOR = 1 + len(EXTERNAL_DATA_QUERIES)
+
+# Seconds between checks for a free network slot
+IDLE_POLL_INTERVAL = 0.1
+
+
+class _Session:
+    """Prefetches of one UI session or API search job."""
+
+    def __init__(self):
+        self.spent = 0
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+
+class Prefetcher:
+    """Warms the caches for the competitors a session is likely to analyze next."""
+
+    def __init__(self, top_n: int, session_budget: int, concurrency: int, max_sessions: int):
+        self.top_n = top_n
+        self.session_budget = session_budget
+        self.concurrency = max(1, concurrency)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        # Without a cache nothing outlives the prefetch
+        return settings.PREFETCH_ENABLED and bool(search_tool.cache or page_cache)
+
+    def schedule(self, session_id: Optional[str], competitors: List[str]) -> int:
+        """
+        Starts prefetching the top competitors of a fresh search on the
+        running loop, replacing the session's earlier prefetches and
+        renewing its budget. Returns the number of competitors scheduled.
+        """
+        if not self.enabled or not session_id:
+            return 0
+        session = self._session(session_id)
+        self._cancel(session)
+        session.spent = 0
+        scheduled = [self._start(session_id, session, name) for name in competitors[:self.top_n]]
+        count = sum(scheduled)
+        if count:
+            log_thought(f"🔮 Prefetching {count} competitors for session {session_id[:8]}")
+        return count
+
+    def focus(self, session_id: Optional[str], competitor: Optional[str], start: bool = True) -> None:
+        """
+        Cancels the session's prefetches of every other competitor once one
+        is picked; with start, prefetches the picked one if it is not yet.
+        """
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            return
+        self._cancel(session, keep=competitor)
+        if start and competitor and self.enabled:
+            self._start(session_id, session, competitor)
+
+    def cancel(self, session_id: Optional[str]) -> None:
+        session = self._sessions.get(session_id) if session_id else None
+        if session is not None:
+            self._cancel(session)
+
+    async def stop(self) -> None:
+        """Cancels every prefetch, e.g. on shutdown."""
+        tasks = [task for session in self._sessions.values() for task in session.tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._sessions.clear()
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+            if len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                self._cancel(oldest)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _start(self, session_id: str, session: _Session, competitor: str) -> bool:
+        key = competitor.strip().lower()
+        if key in session.tasks:
+            # Already prefetched or in progress
+            return False
+        if session.spent + SEARCHES_PER_COMPETITOR > self.session_budget:
+            PREFETCHES.inc(result="over_budget")
+            return False
+        session.spent += SEARCHES_PER_COMPETITOR
+        session.tasks[key] = asyncio.get_running_loop().create_task(self._prefetch(session_id, competitor))
+        return True
+
+    def _cancel(self, session: _Session, keep: Optional[str] = None) -> None:
+        keep = keep.strip().lower() if keep else None
+        for key, task in session.tasks.items():
+            if key != keep:
+                task.cancel()
+        # Cancelled competitors may be prefetched again later
+        session.tasks = {key: task for key, task in session.tasks.items() if key == keep}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def _idle(self) -> None:
+        """Waits until foreground work leaves a network slot free."""
+        while concurrency_limit().locked():
+            await asyncio.sleep(IDLE_POLL_INTERVAL)
+
+    async def _prefetch(self, session_id: str, competitor: str) -> None:
+        try:
+            async with self._semaphore():
+                await self._idle()
+                website = await aget_company_website(competitor)
+                await self._idle()
+                await asyncio.gather(
+                    aextract_company_info(website),
+                    *(asearch_external_source(competitor, source) for source in EXTERNAL_DATA_QUERIES)
+                )
+        except asyncio.CancelledError:
+            PREFETCHES.inc(result="cancelled")
+            raise
+        except Exception as e:
+            PREFETCHES.inc(result="failed")
+            log_thought(f"⚠️ Prefetch of {competitor} failed: {e}")
+        else:
+            PREFETCHES.inc(result="completed")
+            log_thought(f"🔮 Prefetched {competitor} for session {session_id[:8]}")
+
+
+# Shared by the UI, the REST API and the analysis services
+prefetcher = Prefetcher(
+    top_n=settings.PREFETCH_TOP_N,
+    session_budget=settings.PREFETCH_SESSION_BUDGET,
+    concurrency=settings.PREFETCH_CONCURRENCY,
+    max_sessions=settings.PREFETCH_MAX_SESSIONS
+)
@@ -0,0 +1,46 @@
+from utils.dedup import BAND_BITS, BANDS, NearDuplicateIndex, _bands, hamming_distance, simhash
+
+TEXT = " ".join(f"word{i} appears in the sample page number {i % 7}" for i in range(40))
+
+
+def _flip(fingerprint: int, bands: int) -> int:
+    """Flips the lowest bit of each of the first `bands` bands."""
+    for band in range(bands):
+        fingerprint ^= 1 << (band * BAND_BITS)
+    return fingerprint
+
+
+def test_fingerprints_within_seven_bits_share_a_band():
+    fingerprint = simhash(TEXT)
+    other = _flip(fingerprint, BANDS - 1)
+    assert hamming_distance(fingerprint, other) == BANDS - 1
+    shared = [a == b for a, b in zip(_bands(fingerprint), _bands(other))]
+    assert shared == [False] * (BANDS - 1) + [True]
+
+
+def test_band_collision_finds_near_duplicate(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"), max_distance=BANDS - 1)
+    index.add("https://a.example", TEXT)
+    assert index.find_duplicate(_flip(simhash(TEXT), BANDS - 1)) == "https://a.example"
+
+
+def test_band_collision_beyond_max_distance_is_rejected(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"), max_distance=6)
+    index.add("https://a.example", TEXT)
+    # Shares a band, so it is a candidate, but is 7 bits away
+    assert index.find_duplicate(_flip(simhash(TEXT), BANDS - 1)) is None
+
+
+def test_no_shared_band_is_no_candidate(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"), max_distance=64)
+    index.add("https://a.example", TEXT)
+    assert index.find_duplicate(_flip(simhash(TEXT), BANDS)) is None
+
+
+def test_mirror_points_to_first_copy(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"))
+    assert index.add("https://a.example", TEXT) is None
+    assert index.add("https://mirror.example", TEXT) == "https://a.example"
+    assert index.canonical("https://mirror.example") == "https://a.example"
+    # Re-adding the original does not point it at its mirror
+    assert index.add("https://a.example", TEXT) is None
@@ -0,0 +1,34 @@
+from utils.gazetteer import AhoCorasick, Gazetteer
+
+
+def _names(automaton: AhoCorasick, text: str):
+    return [canonical for _, _, canonical in automaton.find(text)]
+
+
+def test_longest_match_wins_at_same_start():
+    automaton = AhoCorasick({"apple": "Apple", "apple music": "Apple Music"})
+    assert _names(automaton, "We tried Apple Music today.") == ["Apple Music"]
+
+
+def test_overlapping_matches_keep_the_earliest():
+    automaton = AhoCorasick({"home depot": "Home Depot", "depot pro": "Depot Pro"})
+    assert _names(automaton, "Home Depot Pro sells tools") == ["Home Depot"]
+
+
+def test_suffix_pattern_found_through_failure_links():
+    automaton = AhoCorasick({"salesforce": "Salesforce", "force": "Force", "sales": "Sales"})
+    assert _names(automaton, "Sales and Force beat Salesforce") == ["Sales", "Force", "Salesforce"]
+
+
+def test_matches_need_word_boundaries_and_capitals():
+    automaton = AhoCorasick({"meta": "Meta", "apple": "Apple"})
+    assert _names(automaton, "Metadata from Meta, apple pie") == ["Meta"]
+
+
+def test_learned_brand_needs_repeated_sightings(tmp_path):
+    gazetteer = Gazetteer(str(tmp_path / "seed.txt"), str(tmp_path / "g.sqlite3"), min_sightings=2)
+    text = ["Compared with Zorblax today"]
+    gazetteer.learn(["Zorblax"])
+    assert gazetteer.match(text) == {}
+    gazetteer.learn(["Zorblax"])
+    assert gazetteer.match(text) == {"Zorblax": 1}
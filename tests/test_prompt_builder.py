@@ -0,0 +1,27 @@
+from utils.prompt_builder import allocate_budget
+
+
+def test_shares_are_rounded_down_within_budget():
+    allocation = allocate_budget({"a": 100, "b": 100, "c": 100}, {}, 100)
+    assert allocation == {"a": 33, "b": 33, "c": 33}
+    assert sum(allocation.values()) <= 100
+
+
+def test_weighted_shares_never_exceed_budget():
+    demands = {"a": 1000, "b": 1000, "c": 1000}
+    weights = {"a": 1.0, "b": 2.0, "c": 0.7}
+    for budget in range(1, 200):
+        assert sum(allocate_budget(demands, weights, budget).values()) <= budget
+
+
+def test_small_demands_are_met_and_the_rest_redistributed():
+    allocation = allocate_budget({"a": 10, "b": 100, "c": 100}, {}, 100)
+    assert allocation == {"a": 10, "b": 45, "c": 45}
+
+
+def test_everything_fits():
+    assert allocate_budget({"a": 10, "b": 20}, {}, 100) == {"a": 10, "b": 20}
+
+
+def test_empty_sources_get_nothing():
+    assert allocate_budget({"a": 0, "b": 50}, {}, 10) == {"a": 0, "b": 10}
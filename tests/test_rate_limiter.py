@@ -0,0 +1,28 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from utils.rate_limiter import parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0", 0.0),
+    ("12", 12.0),
+    ("1.5", 1.5),
+    ("-3", 0.0),
+    (None, None),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 30
+
+
+def test_parse_retry_after_past_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,48 @@
+from utils.report_sections import REPORT_SECTIONS, splice_report, split_report, stale_sections
+
+
+def _report(titles=REPORT_SECTIONS):
+    sections = [f"## {i}. {title}\n{title} text.\n" for i, title in enumerate(titles, start=1)]
+    return "# Report\n\n" + "\n".join(sections)
+
+
+def test_split_returns_every_section_in_order():
+    preamble, sections = split_report(_report())
+    assert preamble == "# Report\n\n"
+    assert list(sections) == list(REPORT_SECTIONS)
+    assert sections["Market Position"] == "## 3. Market Position\nMarket Position text.\n\n"
+
+
+def test_heading_variants_are_recognized():
+    report = _report().replace("## 1. Company Overview", "### **Company overview**")
+    assert split_report(report) is not None
+
+
+def test_split_missing_heading_is_none():
+    titles = [title for title in REPORT_SECTIONS if title != "Market Position"]
+    assert split_report(_report(titles)) is None
+
+
+def test_splice_replaces_only_given_sections():
+    spliced = splice_report(_report(), {"Market Position": "## Market Position\nNew text."})
+    _, sections = split_report(spliced)
+    assert sections["Market Position"].strip() == "## Market Position\nNew text."
+    assert sections["Company Overview"].strip() == "## 1. Company Overview\nCompany Overview text."
+
+
+def test_splice_ignores_unknown_sections():
+    report = _report()
+    assert split_report(splice_report(report, {"Nope": "## Nope"})) == split_report(report.strip())
+
+
+def test_splice_missing_heading_is_none():
+    titles = [title for title in REPORT_SECTIONS if title != "Key Takeaways"]
+    assert splice_report(_report(titles), {"Market Position": "## Market Position"}) is None
+
+
+def test_stale_sections():
+    previous = {title: {"company": "a"} for title in REPORT_SECTIONS}
+    current = dict(previous, **{"Market Position": {"company": "b"}})
+    del previous["Key Takeaways"]
+    assert stale_sections(previous, current) == ["Market Position", "Key Takeaways"]
+    assert stale_sections({}, current) == list(REPORT_SECTIONS)
@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_late_subscriber_gets_latest_value_then_the_rest():
+    async def main():
+        joined = []
+        flights = SingleFlight(on_join=joined.append)
+        release = asyncio.Event()
+        runs = 0
+
+        async def produce():
+            nonlocal runs
+            runs += 1
+            yield "a"
+            yield "ab"
+            await release.wait()
+            yield "abc"
+
+        first = flights.stream("key", produce)
+        assert await first.__anext__() == "a"
+        assert await first.__anext__() == "ab"
+
+        async def collect():
+            return [value async for value in flights.stream("key", produce)]
+
+        late = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        release.set()
+        assert [value async for value in first] == ["abc"]
+        assert await late == ["ab", "abc"]
+        assert runs == 1
+        assert joined == ["key"]
+        assert flights.in_flight() == 0
+
+    asyncio.run(main())
+
+
+def test_run_shares_result():
+    async def main():
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        assert await asyncio.gather(*(flights.run("key", work) for _ in range(3))) == [42, 42, 42]
+        assert calls == 1
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_subscriber():
+    async def main():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.run("key", work) for _ in range(2)), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError, ValueError]
+
+    asyncio.run(main())
+
+
+def test_cancelled_once_last_subscriber_leaves():
+    async def main():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def produce():
+            yield "first"
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield "never"
+
+        first = flights.stream("key", produce)
+        second = flights.stream("key", produce)
+        assert await first.__anext__() == "first"
+        assert await second.__anext__() == "first"
+        await started.wait()
+
+        # The execution keeps going while anyone is still listening
+        await first.aclose()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+        assert flights.in_flight() == 1
+
+        await second.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flights.in_flight() == 0
+
+    asyncio.run(main())
+
+
+def test_new_caller_after_cancellation_starts_fresh():
+    async def main():
+        flights = SingleFlight()
+        runs = 0
+
+        async def produce():
+            nonlocal runs
+            runs += 1
+            yield runs
+            await asyncio.sleep(10)
+
+        stream = flights.stream("key", produce)
+        assert await stream.__anext__() == 1
+        await stream.aclose()
+        stream = flights.stream("key", produce)
+        assert await stream.__anext__() == 2
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_join_after_finish_reruns():
+    async def main():
+        flights = SingleFlight()
+
+        async def work():
+            return object()
+
+        assert await flights.run("key", work) is not await flights.run("key", work)
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("subscribers", [1, 3])
+def test_in_flight_counts_keys(subscribers):
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        tasks = [asyncio.create_task(flights.run("key", work)) for _ in range(subscribers)]
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+        release.set()
+        assert await asyncio.gather(*tasks) == ["done"] * subscribers
+
+    asyncio.run(main())
@@ -1,15 +1,41 @@
-from bs4 import BeautifulSoup
+import asyncio
+import json
 import logging
 import openai
 import re
-import requests
 import time
-from typing import List, Dict, Any
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple
+
+from config.config import settings
+from utils.async_utils import concurrency_limit, run_sync
+from utils.dedup import dedup_index
+from utils.fetch_scheduler import fetch_scheduler
+from utils.html_extractor import aextract_page, is_html_response
+from utils.http_client import get_http_client
+from utils.llm_cache import CACHE_MODES, llm_cache
+from utils.metrics import COALESCED_REQUESTS, MOCK_FALLBACKS, record_cache, track_upstream
+from utils.page_cache import page_cache
+from utils.prompt_builder import build_budgeted_sources
+from utils.rate_limiter import backoff_delay, classify_error, estimate_tokens, get_limiter
+from utils.report_sections import REPORT_SECTIONS, SYNTHESIS_SECTION, split_report
+from utils.single_flight import SingleFlight
+from utils.token_usage import record_token_usage
 
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.INFO)
 
+LLM_MODEL = "gpt-4o"
+
+# Reports that failed to generate start with this instead of holding analysis text
+ANALYSIS_ERROR_PREFIX = "Error generating analysis"
+
+# How the report is written: in one completion, or one completion per section
+REPORT_GENERATION_MODES = ("single", "parallel")
+
+# Identical lookups in flight (e.g. a prefetch and the analysis it anticipates) share one execution
+lookup_flights = SingleFlight(on_join=lambda key: COALESCED_REQUESTS.inc(operation=key[0]))
+
 
 def log_thought(thought: str) -> None:
     """Logs the agent's thought process."""
@@ -20,35 +46,230 @@ def log_thought(thought: str) -> None:
 def retry(
     func: callable,
     *args: List[Any],
-    retries: int = 3,
-    delay: int = 2,
+    upstream: Optional[str] = None,
+    tokens: int = 0,
+    retries: Optional[int] = None,
     **kwargs: Dict[str, Any]
 ) -> any:
-    """Retries a function in case of failure."""
+    """
+    Calls func through the upstream's rate limiter, retrying transient errors.
+    
+    Retries 429s, 5xx responses and connection errors with exponential
+    backoff and jitter, honoring Retry-After. Other errors, and the last
+    failed attempt, are raised to the caller.
+    """
+    retries = retries or settings.RETRY_MAX_ATTEMPTS
+    limiter = get_limiter(upstream) if upstream else None
     for attempt in range(retries):
+        if limiter:
+            limiter.acquire_sync(tokens)
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            log_thought(f"Attempt {attempt + 1} failed: {e}")
+            retryable, retry_after = classify_error(e)
+            if not retryable or attempt == retries - 1:
+                raise
+            if limiter and retry_after:
+                limiter.pause(retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            log_thought(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s")
             time.sleep(delay)
-    log_thought("Max retries reached. Moving on.")
+
+
+async def aretry(
+    func: Callable[..., Awaitable[Any]],
+    *args: List[Any],
+    upstream: Optional[str] = None,
+    tokens: int = 0,
+    retries: Optional[int] = None,
+    **kwargs: Dict[str, Any]
+) -> Any:
+    """Async version of retry for coroutine functions."""
+    retries = retries or settings.RETRY_MAX_ATTEMPTS
+    limiter = get_limiter(upstream) if upstream else None
+    for attempt in range(retries):
+        if limiter:
+            await limiter.acquire(tokens)
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            retryable, retry_after = classify_error(e)
+            if not retryable or attempt == retries - 1:
+                raise
+            if limiter and retry_after:
+                limiter.pause(retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            log_thought(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def _llm_cache_key(
+    messages: List[Dict[str, str]],
+    params: Dict[str, Any],
+    cache_mode: Optional[str]
+) -> Optional[str]:
+    """Returns the LLM cache key for a completion, or None when caching is off."""
+    mode = cache_mode or settings.LLM_CACHE_MODE
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode: {mode}")
+    if not llm_cache or mode == "bypass":
+        return None
+    return llm_cache.make_key(LLM_MODEL, messages, params)
+
+
+def _llm_cache_get(key: Optional[str], cache_mode: Optional[str]) -> Optional[str]:
+    """Returns a cached completion unless the cache is off or being refreshed."""
+    if key is None or (cache_mode or settings.LLM_CACHE_MODE) == "refresh":
+        return None
+    cached = llm_cache.get(key)
+    record_cache("llm", cached is not None)
+    if cached:
+        log_thought(f"⚡ LLM cache hit: {key[:12]} ({llm_cache.stats})")
+        return cached["content"]
     return None
 
 
-def get_search_results(
+def chat_completion(
+    client: openai.Client,
+    messages: List[Dict[str, str]],
+    cache_mode: Optional[str] = None,
+    **params: Any
+) -> str:
+    """Runs a chat completion through the LLM response cache."""
+    key = _llm_cache_key(messages, params, cache_mode)
+    if (cached := _llm_cache_get(key, cache_mode)) is not None:
+        return cached
+    
+    def create() -> Any:
+        with track_upstream("openai", "chat"):
+            return client.chat.completions.create(model=LLM_MODEL, messages=messages, **params)
+    
+    response = retry(
+        create,
+        upstream="openai",
+        tokens=estimate_tokens(messages, params.get("max_tokens"))
+    )
+    record_token_usage(response.usage)
+    content = response.choices[0].message.content or ""
+    if key is not None:
+        llm_cache.set(key, LLM_MODEL, {"content": content})
+    return content
+
+
+async def achat_completion(
+    client: openai.AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    cache_mode: Optional[str] = None,
+    **params: Any
+) -> str:
+    """Async version of chat_completion."""
+    key = _llm_cache_key(messages, params, cache_mode)
+    if (cached := _llm_cache_get(key, cache_mode)) is not None:
+        return cached
+    
+    async def create() -> Any:
+        async with concurrency_limit():
+            with track_upstream("openai", "chat"):
+                return await client.chat.completions.create(model=LLM_MODEL, messages=messages, **params)
+    
+    response = await aretry(
+        create,
+        upstream="openai",
+        tokens=estimate_tokens(messages, params.get("max_tokens"))
+    )
+    record_token_usage(response.usage)
+    content = response.choices[0].message.content or ""
+    if key is not None:
+        llm_cache.set(key, LLM_MODEL, {"content": content})
+    return content
+
+
+async def achat_completion_stream(
+    client: openai.AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    cache_mode: Optional[str] = None,
+    **params: Any
+) -> AsyncIterator[str]:
+    """Streams a chat completion as text deltas, going through the LLM response cache."""
+    key = _llm_cache_key(messages, params, cache_mode)
+    if (cached := _llm_cache_get(key, cache_mode)) is not None:
+        yield cached
+        return
+    
+    async def create() -> Any:
+        # The last chunk then carries the usage of the whole completion
+        return await client.chat.completions.create(
+            model=LLM_MODEL, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+        )
+    
+    parts = []
+    # Timed until the last delta, so this is the full generation time
+    async with concurrency_limit(), track_upstream("openai", "chat_stream"):
+        stream = await aretry(
+            create,
+            upstream="openai",
+            tokens=estimate_tokens(messages, params.get("max_tokens"))
+        )
+        async for chunk in stream:
+            if chunk.choices and (delta := chunk.choices[0].delta.content):
+                parts.append(delta)
+                yield delta
+            record_token_usage(chunk.usage)
+    if key is not None:
+        llm_cache.set(key, LLM_MODEL, {"content": "".join(parts)})
+
+
+def _build_competitor_query(product: str, location: Optional[str]) -> str:
+    """Builds the Serper query used to discover competitors."""
+    if location is None or location.lower() in ("", "global"):
+        return f"top {product} brands competitors"
+    return f"top {product} brands competitors in {location}"
+
+
+def _mock_competitor_urls(product: str) -> List[str]:
+    """Returns mock competitor URLs based on common industry knowledge."""
+    MOCK_FALLBACKS.inc(component="competitor_urls")
+    mock_competitors = {
+        "tesla": ["BMW", "Mercedes-Benz", "Audi", "Volkswagen", "Ford"],
+        "apple": ["Samsung", "Google", "Microsoft", "Amazon", "Meta"],
+        "microsoft": ["Google", "Apple", "Amazon", "Oracle", "IBM"],
+        "amazon": ["Google", "Microsoft", "Apple", "Walmart", "eBay"],
+        "google": ["Microsoft", "Apple", "Amazon", "Meta", "Oracle"],
+        "netflix": ["Disney", "Amazon Prime", "Hulu", "HBO Max", "Spotify"],
+        "spotify": ["Apple Music", "YouTube Music", "Amazon Music", "Pandora", "Tidal"],
+        "uber": ["Lyft", "Taxi", "DoorDash", "Grubhub", "Postmates"],
+        "airbnb": ["Hotels.com", "Booking.com", "Expedia", "VRBO", "Marriott"]
+    }
+    
+    product_lower = product.lower()
+    mock_urls = []
+    
+    # Check if we have mock data for this product
+    for key, competitors in mock_competitors.items():
+        if key in product_lower:
+            for comp in competitors[:3]:
+                mock_urls.append(f"https://www.{comp.lower().replace(' ', '').replace('-', '')}.com")
+            break
+    
+    if not mock_urls:
+        # Generic mock URLs
+        mock_urls = [
+            f"https://www.competitor1-{product.lower()}.com",
+            f"https://www.competitor2-{product.lower()}.com",
+            f"https://www.competitor3-{product.lower()}.com"
+        ]
+    
+    return mock_urls[:3]
+
+
+async def aget_search_results(
     product: str,
     location: str = "global"
 ) -> List[str]:
     """Finds competitor brand names for a product in a given location using Serper API."""
     log_thought(f"Searching for top competitors of {product} in {location}...")
     
-    if location.lower() == "global":
-        query = f"top {product} brands competitors"
-    elif location is None or location.lower() == "":
-        query = f"top {product} brands competitors"
-    else:
-        query = f"top {product} brands competitors in {location}"
-    
+    query = _build_competitor_query(product, location)
     log_thought(f"Search query: {query}")
     
     try:
@@ -56,7 +277,7 @@ def get_search_results(
         from utils.serper_search import search_tool
         
         # Use Serper API for reliable search results
-        search_results = search_tool.search(query)
+        search_results = await search_tool.asearch(query)
         urls = [result["url"] for result in search_results if result.get("url")]
         
         log_thought(f"✅ Found {len(urls)} competitor URLs")
@@ -64,62 +285,71 @@ def get_search_results(
         
     except Exception as e:
         log_thought(f"Search failed: {e}")
-        # Return mock competitor data based on common industry knowledge
-        mock_competitors = {
-            "tesla": ["BMW", "Mercedes-Benz", "Audi", "Volkswagen", "Ford"],
-            "apple": ["Samsung", "Google", "Microsoft", "Amazon", "Meta"],
-            "microsoft": ["Google", "Apple", "Amazon", "Oracle", "IBM"],
-            "amazon": ["Google", "Microsoft", "Apple", "Walmart", "eBay"],
-            "google": ["Microsoft", "Apple", "Amazon", "Meta", "Oracle"],
-            "netflix": ["Disney", "Amazon Prime", "Hulu", "HBO Max", "Spotify"],
-            "spotify": ["Apple Music", "YouTube Music", "Amazon Music", "Pandora", "Tidal"],
-            "uber": ["Lyft", "Taxi", "DoorDash", "Grubhub", "Postmates"],
-            "airbnb": ["Hotels.com", "Booking.com", "Expedia", "VRBO", "Marriott"]
-        }
-        
-        product_lower = product.lower()
-        mock_urls = []
-        
-        # Check if we have mock data for this product
-        for key, competitors in mock_competitors.items():
-            if key in product_lower:
-                for comp in competitors[:3]:
-                    mock_urls.append(f"https://www.{comp.lower().replace(' ', '').replace('-', '')}.com")
-                break
-        
-        if not mock_urls:
-            # Generic mock URLs
-            mock_urls = [
-                f"https://www.competitor1-{product.lower()}.com",
-                f"https://www.competitor2-{product.lower()}.com",
-                f"https://www.competitor3-{product.lower()}.com"
-            ]
-        
-        urls = mock_urls[:3]
+        urls = _mock_competitor_urls(product)
         log_thought(f"Using mock competitor URLs: {urls}")
         return urls
 
 
+def get_search_results(
+    product: str,
+    location: str = "global"
+) -> List[str]:
+    """Sync wrapper around aget_search_results."""
+    return run_sync(aget_search_results(product, location))
+
+
 def clean_competitor_names(names: List[str]) -> List[str]:
     """Cleans and removes duplicate and irrelevant competitor names."""
-    cleaned_names = list(set(names))  # Remove duplicates
     filtered_names = [
-        name.strip() for name in cleaned_names if len(
+        name.strip() for name in names if len(
             name.strip()) > 1 and not any(
             c in name for c in [
                 "review",
                 "comparison",
                 "site"])]
-    filtered_names = re.sub(
-        r'[^a-zA-Z0-9\s]',
-        '',
-        ' '.join(filtered_names)).split()
-    return filtered_names
+    # Strip symbols per name so multi-word brands stay whole
+    filtered_names = [
+        ' '.join(re.sub(r'[^a-zA-Z0-9\s]', '', name).split())
+        for name in filtered_names
+    ]
+    return list(dict.fromkeys(name for name in filtered_names if name))  # Remove duplicates
+
+
+def _mock_extract_competitor_names(text: str) -> List[str]:
+    """Extracts potential company names using simple heuristics."""
+    MOCK_FALLBACKS.inc(component="competitor_extraction")
+    words = text.split()
+    potential_names = []
+    for i, word in enumerate(words):
+        if word.istitle() and len(word) > 2:
+            # Check if next word is also capitalized (likely company name)
+            if i + 1 < len(words) and words[i + 1].istitle():
+                potential_names.append(f"{word} {words[i + 1]}")
+            else:
+                potential_names.append(word)
+    return clean_competitor_names(potential_names[:10])  # Return first 10
+
+
+def _build_extraction_messages(text: str) -> List[Dict[str, str]]:
+    """Builds the chat messages for competitor name extraction."""
+    prompt = f"""
+    Extract and list company names from the following text:
+    {text}
+    Only return company names, no extra text, symbols, separators, special characters, or numbers.
+    Remove any duplicates and irrelevant names.
+    Remove any name that is not related to product brands.
+    Remove any name that is not a company or brand.
+    """
+    return [
+        {"role": "system", "content": "You are a helpful assistant extracting competitor names."},
+        {"role": "user", "content": prompt}
+    ]
 
 
 def extract_competitor_names(
     client: openai.Client,
-    text: str
+    text: str,
+    cache_mode: Optional[str] = None
 ) -> List[str]:
     """Uses GPT-4o to extract competitor brand names from web page content."""
     log_thought("Extracting competitor names from webpage content...")
@@ -127,113 +357,338 @@ def extract_competitor_names(
     # If no client available, use mock extraction
     if not client:
         log_thought("No OpenAI client available, using mock competitor extraction...")
-        # Extract potential company names using simple heuristics
-        words = text.split()
-        potential_names = []
-        for i, word in enumerate(words):
-            if word.istitle() and len(word) > 2:
-                # Check if next word is also capitalized (likely company name)
-                if i + 1 < len(words) and words[i + 1].istitle():
-                    potential_names.append(f"{word} {words[i + 1]}")
-                else:
-                    potential_names.append(word)
-        return clean_competitor_names(potential_names[:10])  # Return first 10
+        return _mock_extract_competitor_names(text)
+    
+    try:
+        content = chat_completion(client, _build_extraction_messages(text), cache_mode)
+        return clean_competitor_names(content.strip().split("\n"))
+    except Exception as e:
+        log_thought(f"OpenAI API error: {e}")
+        return []
+
+
+async def aextract_competitor_names(
+    client: openai.AsyncOpenAI,
+    text: str,
+    cache_mode: Optional[str] = None
+) -> List[str]:
+    """Async version of extract_competitor_names using an AsyncOpenAI client."""
+    log_thought("Extracting competitor names from webpage content...")
+    
+    if not client:
+        log_thought("No OpenAI client available, using mock competitor extraction...")
+        return _mock_extract_competitor_names(text)
     
+    try:
+        content = await achat_completion(client, _build_extraction_messages(text), cache_mode)
+        return clean_competitor_names(content.strip().split("\n"))
+    except Exception as e:
+        log_thought(f"OpenAI API error: {e}")
+        return []
+
+
+def _pack_pages(pages: Dict[str, str], max_chars: int) -> List[Dict[str, str]]:
+    """Packs pages into as few chunks as fit max_chars (first-fit decreasing)."""
+    chunks: List[Dict[str, str]] = []
+    sizes: List[int] = []
+    for url, text in sorted(pages.items(), key=lambda item: len(item[1]), reverse=True):
+        text = text[:max_chars]
+        for index, size in enumerate(sizes):
+            if size + len(text) <= max_chars:
+                chunks[index][url] = text
+                sizes[index] += len(text)
+                break
+        else:
+            chunks.append({url: text})
+            sizes.append(len(text))
+    return chunks
+
+
+def _build_batch_extraction_messages(pages: Dict[str, str]) -> List[Dict[str, str]]:
+    """Builds one extraction request covering several pages, tagged by source."""
+    sources = "\n".join(
+        f'<source id="{index}" url="{url}">\n{text}\n</source>'
+        for index, (url, text) in enumerate(pages.items(), start=1)
+    )
     prompt = f"""
-    Extract and list company names from the following text:
-    {text}
-    Only return company names, no extra text, symbols, separators, special characters, or numbers.
+    Extract the company and product brand names mentioned in the sources below.
+    {sources}
+    Respond with JSON of the form {{"competitors": [{{"name": "Brand", "sources": [1, 2]}}]}}.
+    Use each brand's common name, without extra text, symbols or numbers.
     Remove any duplicates and irrelevant names.
-    Remove any name that is not related to product brands.
     Remove any name that is not a company or brand.
     """
+    return [
+        {"role": "system", "content": "You are a helpful assistant extracting competitor names. Reply in JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _parse_batch_extraction(content: str) -> List[str]:
+    """Reads brand names from a batch extraction response."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant extracting competitor names."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return clean_competitor_names(
-            response.choices[0].message.content.strip().split("\n"))
-    except Exception as e:
-        log_thought(f"OpenAI API error: {e}")
+        competitors = json.loads(content).get("competitors", [])
+    except (ValueError, AttributeError):
+        return content.strip().split("\n")
+    names = []
+    for competitor in competitors:
+        name = competitor.get("name") if isinstance(competitor, dict) else competitor
+        if isinstance(name, str):
+            names.append(name)
+    return names
+
+
+async def aextract_competitor_names_batch(
+    client: openai.AsyncOpenAI,
+    pages: Dict[str, str],
+    cache_mode: Optional[str] = None
+) -> List[str]:
+    """
+    Extracts competitor brand names from several pages with as few GPT-4o calls as possible.
+    
+    Pages are packed into one request with source tags; only when their
+    combined text exceeds EXTRACTION_BATCH_MAX_CHARS are they split into
+    the minimal number of chunks, which are sent concurrently.
+    """
+    pages = {url: text for url, text in pages.items() if text}
+    if not pages:
         return []
+    
+    if not client:
+        log_thought("No OpenAI client available, using mock competitor extraction...")
+        names = []
+        for text in pages.values():
+            names.extend(_mock_extract_competitor_names(text))
+        return clean_competitor_names(names)
+    
+    chunks = _pack_pages(pages, settings.EXTRACTION_BATCH_MAX_CHARS)
+    log_thought(f"Extracting competitor names from {len(pages)} pages in {len(chunks)} request(s)...")
+    
+    async def extract(chunk: Dict[str, str]) -> List[str]:
+        try:
+            content = await achat_completion(
+                client,
+                _build_batch_extraction_messages(chunk),
+                cache_mode,
+                response_format={"type": "json_object"}
+            )
+            return _parse_batch_extraction(content)
+        except Exception as e:
+            log_thought(f"OpenAI API error: {e}")
+            return []
+    
+    names = []
+    for chunk_names in await asyncio.gather(*(extract(chunk) for chunk in chunks)):
+        names.extend(chunk_names)
+    return clean_competitor_names(names)
 
 
-def get_company_website(company_name: str) -> str:
+async def aget_company_website(company_name: str) -> str:
     """Finds the official website of a company using Serper API."""
+    return await lookup_flights.run(
+        ("company_website", company_name.strip().lower()),
+        lambda: _aget_company_website(company_name)
+    )
+
+
+async def _aget_company_website(company_name: str) -> str:
     log_thought(f"Searching for official website of {company_name}...")
     query = f"{company_name} official website"
     try:
         from utils.serper_search import search_tool
-        results = search_tool.search(query)
+        results = await search_tool.asearch(query)
         if results:
             return results[0]["url"]
     except Exception as e:
         log_thought(f"Error searching for website: {e}")
     
     # Return a mock website for testing
+    MOCK_FALLBACKS.inc(component="company_website")
     return f"https://www.{company_name.lower().replace(' ', '')}.com"
 
 
-def extract_company_info(url: str) -> Dict[str, str]:
+def get_company_website(company_name: str) -> str:
+    """Sync wrapper around aget_company_website."""
+    return run_sync(aget_company_website(company_name))
+
+
+async def aextract_company_info(url: str) -> Dict[str, str]:
     """Scrapes key data from the competitor's website."""
+    return await lookup_flights.run(("page", url), lambda: _aextract_company_info(url))
+
+
+async def _aextract_company_info(url: str) -> Dict[str, str]:
+    cached = page_cache.get(url) if page_cache else None
+    if page_cache:
+        record_cache("page", bool(cached and page_cache.is_fresh(cached)))
+    if cached and page_cache.is_fresh(cached):
+        log_thought(f"⚡ Page cache hit: {url}")
+        return cached["data"]
+    
     log_thought(f"Scraping website: {url}")
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(response.text, "html.parser")
-        title = soup.title.text if soup.title else ""
-        description = " ".join([p.text for p in soup.find_all("p")])[
-            :2000]  # Limit text to 2000 chars
-        return {"website": url, "title": title, "description": description}
+        if not await fetch_scheduler.allowed(url):
+            log_thought(f"Skipping {url}: disallowed by robots.txt")
+            return {}
+        
+        async with fetch_scheduler.slot(url), concurrency_limit(), track_upstream("website", "fetch"):
+            async with get_http_client().stream(
+                "GET",
+                url,
+                headers=page_cache.revalidation_headers(cached) if page_cache else None,
+                timeout=5
+            ) as response:
+                if cached and response.status_code == 304:
+                    log_thought(f"⚡ Page not modified: {url}")
+                    page_cache.touch(url)
+                    return cached["data"]
+                
+                if not is_html_response(response):
+                    log_thought(f"Skipping non-HTML content at {url}: {response.headers.get('Content-Type')}")
+                    return {}
+                
+                # Read only as much of the body as the extraction needs
+                data = await aextract_page(
+                    url,
+                    response,
+                    max_bytes=settings.SCRAPE_MAX_BYTES,
+                    max_chars=settings.SCRAPE_MAX_CHARS
+                )
+        
+        if dedup_index and response.is_success:
+            if duplicate_of := dedup_index.add(url, data.get("description", "")):
+                log_thought(f"♊ {url} nearly duplicates {duplicate_of}")
+        if page_cache and response.is_success:
+            page_cache.store(
+                url,
+                data,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return data
     except Exception as e:
         log_thought(f"Error scraping {url}: {e}")
         return {}
 
 
-def search_external_data(company_name: str) -> Dict[str, str]:
+def extract_company_info(url: str) -> Dict[str, str]:
+    """Sync wrapper around aextract_company_info."""
+    return run_sync(aextract_company_info(url))
+
+
+def canonical_url(url: str) -> str:
+    """Maps a URL known to mirror another page onto that page, which is usually cached."""
+    if not dedup_index:
+        return url
+    canonical = dedup_index.canonical(url)
+    if canonical != url:
+        log_thought(f"♊ Skipping known duplicate {url}, using {canonical}")
+    return canonical
+
+
+# External data sources collected for every report, in report order
+EXTERNAL_DATA_QUERIES = {
+    "reviews": "{company} customer reviews",
+    "market_analysis": "{company} market analysis",
+    "financials": "{company} financial data",
+    "third_party": "{company} third party evaluation",
+}
+
+EXTERNAL_DATA_LABELS = {
+    "reviews": "Customer Reviews",
+    "market_analysis": "Market Analysis",
+    "financials": "Financial Data",
+    "third_party": "Third-Party Evaluation",
+}
+
+
+async def asearch_external_source(company_name: str, source: str) -> str:
+    """Runs the query for one external data source and scrapes its first result."""
+    return await lookup_flights.run(
+        ("external_source", company_name.strip().lower(), source),
+        lambda: _asearch_external_source(company_name, source)
+    )
+
+
+async def _asearch_external_source(company_name: str, source: str) -> str:
+    query = EXTERNAL_DATA_QUERIES[source].format(company=company_name)
+    try:
+        from utils.serper_search import search_tool
+        results = await search_tool.asearch(query)
+        if results:
+            # Take the first result, fetching its canonical copy if it is a known mirror
+            result = await aextract_company_info(canonical_url(results[0]["url"]))
+            if result:
+                return result.get("description", "") + "\n"
+    except Exception as e:
+        log_thought(f"Error searching for query '{query}': {e}")
+    return ""
+
+
+def combine_external_data(sections: Dict[str, str]) -> Dict[str, str]:
+    """Joins per-source external data in report order, keeping the sections."""
+    description = "".join(sections.get(source, "") for source in EXTERNAL_DATA_QUERIES)
+    return {**sections, "description": description}
+
+
+async def asearch_external_data(company_name: str) -> Dict[str, str]:
     """Searches for external market insights, customer reviews, and financial data."""
     log_thought(f"Searching for external data on {company_name}...")
-    queries = [
-        f"{company_name} customer reviews",
-        f"{company_name} market analysis",
-        f"{company_name} financial data",
-        f"{company_name} third party evaluation"
-    ]
-    data = ""
-    for query in queries:
-        try:
-            from utils.serper_search import search_tool
-            results = search_tool.search(query)
-            if results:
-                # Take the first result
-                result = extract_company_info(results[0]["url"])
-                if result:
-                    data += result.get("description", "") + "\n"
-        except Exception as e:
-            log_thought(f"Error searching for query '{query}': {e}")
-    return {"description": data}
+    results = await asyncio.gather(
+        *(asearch_external_source(company_name, source) for source in EXTERNAL_DATA_QUERIES)
+    )
+    return combine_external_data(dict(zip(EXTERNAL_DATA_QUERIES, results)))
 
 
-def generate_competitor_analysis(
-    client: openai.Client,
+def search_external_data(company_name: str) -> Dict[str, str]:
+    """Sync wrapper around asearch_external_data."""
+    return run_sync(asearch_external_data(company_name))
+
+
+def _build_analysis_prompt(
     company_name: str,
     company_data: Dict[str, str],
-    external_data: Dict[str, str]
+    external_data: Dict[str, str],
+    sections: Optional[List[str]] = None,
+    sources: Optional[Tuple[str, ...]] = None,
+    budget: Optional[int] = None
 ) -> str:
-    """Generates a competitor analysis report using GPT-4o."""
-    log_thought(f"Generating competitor analysis for: {company_name}...")
-    
+    """
+    Builds the report prompt from collected company and market data, for
+    all or some sections, optionally from only some of the sources.
+    """
     # Handle missing keys safely
     website = company_data.get('website', f"https://www.{company_name.lower().replace(' ', '')}.com")
     title = company_data.get('title', company_name)
-    description = company_data.get('description', f"Company information for {company_name}")
-    external_desc = external_data.get('description', 'Limited external data available')
     
-    prompt = f"""
+    # Deduplicate sources and fit them into the prompt token budget
+    external_sources = [
+        (source, external_data[source]) for source in EXTERNAL_DATA_QUERIES if source in external_data
+    ] or [("external", external_data.get('description', ''))]
+    candidates = [("company", company_data.get('description', '')), *external_sources]
+    if sources is not None:
+        # Combined external text cannot be attributed to a source, so it is always kept
+        candidates = [(name, text) for name, text in candidates if name in sources or name == "external"]
+    budgeted = build_budgeted_sources(
+        candidates,
+        budget=budget or settings.REPORT_PROMPT_TOKEN_BUDGET,
+        weights=settings.REPORT_PROMPT_SOURCE_WEIGHTS
+    )
+    description = budgeted.pop("company", "") or f"Company information for {company_name}"
+    external_desc = "\n\n".join(
+        f"{EXTERNAL_DATA_LABELS[source]}:\n{text}" if source in EXTERNAL_DATA_LABELS else text
+        for source, text in budgeted.items() if text
+    ) or 'Limited external data available'
+    
+    sections = sections or list(REPORT_SECTIONS)
+    if len(sections) == len(REPORT_SECTIONS):
+        scope = "Provide an in-depth competitor analysis"
+    else:
+        scope = "Write only the following sections of an in-depth competitor analysis"
+    # Fixed headings let stored reports be split into sections and refreshed section by section
+    headings = "\n    ".join(f"## {section}" for section in sections)
+    
+    return f"""
     Analyze the following competitor:
 
     Company Name: {company_name}
@@ -246,27 +701,73 @@ def generate_competitor_analysis(
     Additional Market Insights:
     {external_desc}
 
-    Provide an in-depth competitor analysis, including:
-    - Company Overview
-    - Strengths & Weaknesses
-    - Market Position
-    - Unique Selling Proposition (USP)
-    - Online Presence & Branding
-    - Marketing & Advertising Strategy
-    - Key Products & Services
-    - Customer Review Summary & Sentiment
-    - Market and Financial Data
-    - Third-Party Evaluation
-    - Key Takeaways
+    {scope}, with each section under exactly this Markdown heading, in this order:
+    {headings}
 
     Please ensure the report is detailed, accurate, and well-structured.
     Provide actionable insights and recommendations for the user.
     Provide references and citations where necessary.
     """
-    
-    if not client:
-        log_thought("No OpenAI client available, generating mock analysis...")
-        return f"""
+
+
+def _build_analysis_messages(
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    sections: Optional[List[str]] = None
+) -> List[Dict[str, str]]:
+    """Builds the chat messages for the competitor analysis report."""
+    return [
+        {"role": "system", "content": "You are a business analyst. Generate a competitor analysis report."},
+        {"role": "user", "content": _build_analysis_prompt(company_name, company_data, external_data, sections)}
+    ]
+
+
+def _build_section_messages(
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    section: str
+) -> List[Dict[str, str]]:
+    """Builds the chat messages for one report section, given only the sources it is written from."""
+    prompt = _build_analysis_prompt(
+        company_name,
+        company_data,
+        external_data,
+        [section],
+        sources=REPORT_SECTIONS[section],
+        budget=settings.REPORT_SECTION_PROMPT_TOKEN_BUDGET
+    )
+    return [
+        {"role": "system", "content": "You are a business analyst. Generate a competitor analysis report."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _build_synthesis_messages(company_name: str, sections: Dict[str, str]) -> List[Dict[str, str]]:
+    """Builds the chat messages for the closing section, written from the other sections."""
+    body = "\n\n".join(sections.values())
+    return [
+        {"role": "system", "content": "You are a business analyst. Generate a competitor analysis report."},
+        {"role": "user", "content": f"""
+    Below are the sections of a competitor analysis of {company_name}:
+
+    {body}
+
+    Write only the closing section, under exactly this Markdown heading:
+    ## {SYNTHESIS_SECTION}
+
+    Summarize the most important findings as a short list of actionable takeaways for the user.
+    """}
+    ]
+
+
+def _mock_competitor_analysis(company_name: str, company_data: Dict[str, str]) -> str:
+    """Returns a sample report used when no OpenAI client is configured."""
+    log_thought("No OpenAI client available, generating mock analysis...")
+    MOCK_FALLBACKS.inc(component="analysis")
+    website = company_data.get('website', f"https://www.{company_name.lower().replace(' ', '')}.com")
+    return f"""
 # Competitor Analysis: {company_name}
 
 ## Company Overview
@@ -292,17 +793,185 @@ Based on available data, {company_name} holds a significant position in the mark
 
 *Note: This is a sample analysis. For detailed insights, configure your OpenAI API key.*
         """
+
+
+def generate_competitor_analysis(
+    client: openai.Client,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    cache_mode: Optional[str] = None
+) -> str:
+    """Generates a competitor analysis report using GPT-4o."""
+    log_thought(f"Generating competitor analysis for: {company_name}...")
+    
+    if not client:
+        return _mock_competitor_analysis(company_name, company_data)
+    
+    try:
+        content = chat_completion(
+            client,
+            _build_analysis_messages(company_name, company_data, external_data),
+            cache_mode
+        )
+        log_thought("✅ Analysis generated successfully")
+        return content.strip()
+    except Exception as e:
+        log_thought(f"OpenAI API error: {e}")
+        return f"{ANALYSIS_ERROR_PREFIX}: {str(e)}"
+
+
+async def agenerate_competitor_analysis(
+    client: openai.AsyncOpenAI,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    cache_mode: Optional[str] = None
+) -> str:
+    """Async version of generate_competitor_analysis using an AsyncOpenAI client."""
+    log_thought(f"Generating competitor analysis for: {company_name}...")
+    
+    if not client:
+        return _mock_competitor_analysis(company_name, company_data)
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a business analyst. Generate a competitor analysis report."},
-                {"role": "user", "content": prompt}
-            ]
+        content = await achat_completion(
+            client,
+            _build_analysis_messages(company_name, company_data, external_data),
+            cache_mode
         )
         log_thought("✅ Analysis generated successfully")
-        return response.choices[0].message.content.strip()
+        return content.strip()
+    except Exception as e:
+        log_thought(f"OpenAI API error: {e}")
+        return f"{ANALYSIS_ERROR_PREFIX}: {str(e)}"
+
+
+async def agenerate_competitor_analysis_stream(
+    client: openai.AsyncOpenAI,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    cache_mode: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Streams a competitor analysis report from GPT-4o as it is generated.
+    Raises when the completion fails, possibly after some text was yielded.
+    """
+    log_thought(f"Generating competitor analysis for: {company_name}...")
+    
+    if not client:
+        yield _mock_competitor_analysis(company_name, company_data)
+        return
+    
+    try:
+        async for delta in achat_completion_stream(
+            client,
+            _build_analysis_messages(company_name, company_data, external_data),
+            cache_mode
+        ):
+            yield delta
+        log_thought("✅ Analysis generated successfully")
+    except Exception as e:
+        log_thought(f"OpenAI API error: {e}")
+        raise
+
+
+async def agenerate_report_sections(
+    client: openai.AsyncOpenAI,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    sections: List[str],
+    cache_mode: Optional[str] = None
+) -> str:
+    """Generates only the given report sections, each under its own heading."""
+    log_thought(f"Generating {len(sections)} report sections for: {company_name}...")
+    content = await achat_completion(
+        client,
+        _build_analysis_messages(company_name, company_data, external_data, sections),
+        cache_mode
+    )
+    return content.strip()
+
+
+def _with_heading(section: str, text: str) -> str:
+    """Puts a generated section under its heading when the model left it out."""
+    text = text.strip()
+    if split_report(text, [section]) is None:
+        text = f"## {section}\n\n{text}"
+    return text
+
+
+async def agenerate_sections_parallel(
+    client: openai.AsyncOpenAI,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    sections: List[str],
+    context: Optional[Dict[str, str]] = None,
+    cache_mode: Optional[str] = None
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Generates report sections as concurrent completions, each given only the
+    sources it is written from, and yields (title, text) in report order as
+    soon as every earlier section is done. The synthesis section is written
+    last from the other sections, including those in context (the unchanged
+    sections of a report being refreshed).
+    """
+    mapped = [section for section in REPORT_SECTIONS if section in sections and section != SYNTHESIS_SECTION]
+    log_thought(f"Generating {len(sections)} report sections in parallel for: {company_name}...")
+    
+    async def generate(section: str) -> str:
+        messages = _build_section_messages(company_name, company_data, external_data, section)
+        return _with_heading(section, await achat_completion(client, messages, cache_mode))
+    
+    tasks = [asyncio.ensure_future(generate(section)) for section in mapped]
+    written = dict(context or {})
+    try:
+        for section, task in zip(mapped, tasks):
+            written[section] = await task
+            yield section, written[section]
+        if SYNTHESIS_SECTION in sections:
+            others = {
+                section: written[section] for section in REPORT_SECTIONS
+                if section in written and section != SYNTHESIS_SECTION
+            }
+            content = await achat_completion(client, _build_synthesis_messages(company_name, others), cache_mode)
+            yield SYNTHESIS_SECTION, _with_heading(SYNTHESIS_SECTION, content)
+    finally:
+        # A failed section or an early stop leaves the rest running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def agenerate_competitor_analysis_parallel(
+    client: openai.AsyncOpenAI,
+    company_name: str,
+    company_data: Dict[str, str],
+    external_data: Dict[str, str],
+    cache_mode: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Streams a competitor analysis report written section by section in
+    parallel. Raises when any section fails, possibly after earlier
+    sections were yielded.
+    """
+    log_thought(f"Generating competitor analysis for: {company_name}...")
+    
+    if not client:
+        yield _mock_competitor_analysis(company_name, company_data)
+        return
+    
+    try:
+        separator = ""
+        async for _, text in agenerate_sections_parallel(
+            client, company_name, company_data, external_data, list(REPORT_SECTIONS), cache_mode=cache_mode
+        ):
+            yield separator + text
+            separator = "\n\n"
+        log_thought("✅ Analysis generated successfully")
     except Exception as e:
         log_thought(f"OpenAI API error: {e}")
-        return f"Error generating analysis: {str(e)}"
+        raise
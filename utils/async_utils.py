@@ -0,0 +1,106 @@
+"""
+Helpers for running the async workflow engine from sync code and for
+bounding the number of concurrent network calls. Sync code runs its
+coroutines on one long-lived background loop.
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Optional, TypeVar
+
+from config.config import settings
+from utils.http_client import aclose_http_client
+
+
+T = TypeVar("T")
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def concurrency_limit() -> asyncio.Semaphore:
+    """
+    Returns the semaphore capping concurrent network calls on the running loop.
+
+    Only leaf I/O calls (one HTTP request, one LLM call) should acquire it,
+    so nested fan-outs can never deadlock waiting on each other.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, settings.MAX_CONCURRENCY))
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+class _BackgroundLoop:
+    """
+    Event loop on a daemon thread that runs every run_sync call, so sync
+    callers share one HTTP client and keep its pooled connections alive.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="run-sync-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def close(self) -> None:
+        """Closes the loop's HTTP client and stops the loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(aclose_http_client(), loop).result(timeout=5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_background = _BackgroundLoop()
+
+
+async def _run(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+async def _run_and_close(awaitable: Awaitable[T]) -> T:
+    try:
+        return await awaitable
+    finally:
+        await aclose_http_client()
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """Runs a coroutine to completion from synchronous code."""
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    
+    if running is not None and running is _background.loop:
+        # Blocking the background loop on itself would deadlock, so use a throwaway loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, _run_and_close(awaitable)).result()
+    
+    future = asyncio.run_coroutine_threadsafe(_run(awaitable), _background.get())
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. KeyboardInterrupt: stop the coroutine rather than leave it running
+        future.cancel()
+        raise
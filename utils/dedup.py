@@ -0,0 +1,166 @@
+"""
+Near-duplicate detection for scraped text. Pages are fingerprinted with a
+64-bit SimHash over word shingles and indexed in SQLite with LSH banding
+(eight 8-bit bands, so any pair within distance 7 shares a band). This
+recognizes syndicated copies and mirrors across runs without comparing
+against every stored page.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.config import settings
+from utils.cache import connect_sqlite
+
+
+SHINGLE_SIZE = 3
+BANDS = 8
+BAND_BITS = 64 // BANDS
+# Texts shorter than this many words give unreliable fingerprints
+MIN_WORDS = 20
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of a text's word shingles, or None for very short texts."""
+    words = _words(text)
+    if len(words) < MIN_WORDS:
+        return None
+    weights = [0] * 64
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        shingle = " ".join(words[i:i + SHINGLE_SIZE])
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _bands(fingerprint: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+
+def drop_near_duplicates(
+    texts: List[Tuple[str, str]],
+    max_distance: int = 6
+) -> Dict[str, str]:
+    """
+    Blanks texts that nearly duplicate an earlier one.
+
+    Args:
+        texts: (name, text) pairs in priority order
+        max_distance: Largest SimHash Hamming distance treated as a duplicate
+
+    Returns:
+        Text per name, with duplicates replaced by ""
+    """
+    kept: List[int] = []
+    result = {}
+    for name, text in texts:
+        fingerprint = simhash(text or "")
+        if fingerprint is not None and any(hamming_distance(fingerprint, f) <= max_distance for f in kept):
+            result[name] = ""
+            continue
+        if fingerprint is not None:
+            kept.append(fingerprint)
+        result[name] = text
+    return result
+
+
+class NearDuplicateIndex:
+    """Persistent SimHash index mapping every seen URL to its canonical copy."""
+
+    def __init__(self, path: str, max_distance: int = 6):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                canonical_url TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS fingerprint_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS fingerprint_bands_lookup ON fingerprint_bands (band, value);
+            """
+        )
+
+    def find_duplicate(self, fingerprint: int, exclude_url: Optional[str] = None) -> Optional[str]:
+        """Returns the canonical URL of a stored near-duplicate, if any."""
+        with self._lock:
+            candidates = set()
+            for band, value in enumerate(_bands(fingerprint)):
+                rows = self._conn.execute(
+                    "SELECT url FROM fingerprint_bands WHERE band = ? AND value = ?", (band, value)
+                ).fetchall()
+                candidates.update(row[0] for row in rows)
+            candidates.discard(exclude_url)
+            for url in sorted(candidates):
+                row = self._conn.execute(
+                    "SELECT fingerprint, canonical_url FROM fingerprints WHERE url = ?", (url,)
+                ).fetchone()
+                if row and hamming_distance(fingerprint, int(row[0], 16)) <= self.max_distance:
+                    return row[1]
+        return None
+
+    def add(self, url: str, text: str) -> Optional[str]:
+        """
+        Fingerprints a page and records it.
+
+        Returns:
+            The canonical URL when the page nearly duplicates another one
+        """
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+        duplicate_of = self.find_duplicate(fingerprint, exclude_url=url)
+        if duplicate_of == url:
+            # A mirror of this page was indexed first and already points here
+            duplicate_of = None
+        with self._lock:
+            self._conn.execute("DELETE FROM fingerprint_bands WHERE url = ?", (url,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                (url, f"{fingerprint:016x}", duplicate_of or url, time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO fingerprint_bands VALUES (?, ?, ?)",
+                [(band, value, url) for band, value in enumerate(_bands(fingerprint))]
+            )
+        return duplicate_of
+
+    def canonical(self, url: str) -> str:
+        """Returns the canonical copy for a URL known to duplicate another page."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT canonical_url FROM fingerprints WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else url
+
+
+def create_dedup_index() -> Optional[NearDuplicateIndex]:
+    """Creates the near-duplicate index from settings, or None when disabled."""
+    if not settings.DEDUP_ENABLED:
+        return None
+    return NearDuplicateIndex(settings.DEDUP_INDEX_PATH, settings.DEDUP_MAX_DISTANCE)
+
+
+# Global instance
+dedup_index = create_dedup_index()
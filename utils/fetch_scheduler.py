@@ -0,0 +1,115 @@
+"""
+Per-host politeness for scraping. Every page fetch takes a slot from its
+host, which caps concurrent connections per host and spaces requests to
+the same host by a minimum delay (or the robots.txt Crawl-delay, if
+longer). Fetches to different hosts proceed in parallel. Concurrent
+first fetches to a host share one robots.txt download.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from config.config import settings
+from utils.http_client import DEFAULT_HEADERS, get_http_client
+from utils.metrics import COALESCED_REQUESTS
+from utils.single_flight import SingleFlight
+
+
+class HostScheduler:
+    """Caps concurrency and enforces a minimum delay per host, honoring robots.txt."""
+
+    def __init__(
+        self,
+        max_per_host: int = 2,
+        min_delay: float = 0.5,
+        respect_robots: bool = True,
+        max_crawl_delay: float = 10.0,
+        robots_ttl: int = 86400
+    ):
+        self.max_per_host = max_per_host
+        self.min_delay = min_delay
+        self.respect_robots = respect_robots
+        self.max_crawl_delay = max_crawl_delay
+        self.robots_ttl = robots_ttl
+        self._next_start: Dict[str, float] = {}
+        self._robots: Dict[str, Tuple[float, Optional[RobotFileParser]]] = {}
+        self._lock = threading.Lock()
+        self._robots_flights = SingleFlight(on_join=lambda key: COALESCED_REQUESTS.inc(operation="robots"))
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def allowed(self, url: str) -> bool:
+        """Whether robots.txt allows fetching the URL."""
+        robots = await self._get_robots(url)
+        return robots is None or robots.can_fetch(DEFAULT_HEADERS["User-Agent"], url)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Holds a connection slot for the URL's host for the duration of a fetch."""
+        host = urlsplit(url).netloc.lower()
+        delay = await self._host_delay(url)
+        async with self._semaphore(host):
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(max(1, self.max_per_host))
+        return semaphores[host]
+
+    async def _host_delay(self, url: str) -> float:
+        robots = await self._get_robots(url)
+        crawl_delay = robots.crawl_delay(DEFAULT_HEADERS["User-Agent"]) if robots else None
+        return max(self.min_delay, min(float(crawl_delay or 0), self.max_crawl_delay))
+
+    async def _get_robots(self, url: str) -> Optional[RobotFileParser]:
+        """Returns the cached robots.txt rules for the URL's host, fetching them if needed."""
+        if not self.respect_robots:
+            return None
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        cached = self._robots.get(origin)
+        if cached and cached[0] > time.time():
+            return cached[1]
+        return await self._robots_flights.run(origin, lambda: self._fetch_robots(origin))
+
+    async def _fetch_robots(self, origin: str) -> Optional[RobotFileParser]:
+        robots = None
+        try:
+            response = await get_http_client().get(f"{origin}/robots.txt", timeout=5)
+            if response.status_code in (401, 403):
+                # Access-controlled robots.txt means the whole site is off limits
+                robots = RobotFileParser()
+                robots.disallow_all = True
+            elif response.status_code < 400:
+                robots = RobotFileParser()
+                robots.parse(response.text.splitlines())
+        except Exception:
+            # Unreachable robots.txt means no restrictions
+            robots = None
+        self._robots[origin] = (time.time() + self.robots_ttl, robots)
+        return robots
+
+
+# Global instance
+fetch_scheduler = HostScheduler(
+    max_per_host=settings.SCRAPE_MAX_CONNECTIONS_PER_HOST,
+    min_delay=settings.SCRAPE_MIN_DELAY_PER_HOST,
+    respect_robots=settings.SCRAPE_RESPECT_ROBOTS,
+    max_crawl_delay=settings.SCRAPE_MAX_CRAWL_DELAY,
+    robots_ttl=settings.ROBOTS_CACHE_TTL
+)
@@ -0,0 +1,212 @@
+"""
+Brand gazetteer for competitor name extraction without an LLM call. Brand
+names come from an editable seed list plus names learned from past LLM
+extractions, and are compiled into an Aho-Corasick automaton that finds
+every known brand in a page in a single pass over its text. A learned name
+is only matched once several extractions agreed on it, and is forgotten
+when no extraction has seen it for a while.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.config import settings
+from utils.cache import connect_sqlite
+
+
+# Seconds before the automaton is rebuilt so learned names age out
+AUTOMATON_MAX_AGE = 3600
+
+class AhoCorasick:
+    """Multi-pattern matcher reporting whole-word, case-insensitive (but not all-lowercase) matches."""
+
+    def __init__(self, patterns: Dict[str, str]):
+        """Builds the automaton from a mapping of pattern to canonical name."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length, canonical name) for every pattern ending at a state
+        self._output: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, canonical in patterns.items():
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((len(pattern), canonical))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self._goto[state].items():
+                queue.append(target)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[target] = self._goto[fail].get(char, 0)
+                self._output[target] = self._output[target] + self._output[self._fail[target]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Returns non-overlapping (start, end, canonical) matches, preferring longer ones."""
+        lowered = text.lower()
+        # Lowercasing can change the length of some characters; word
+        # boundaries are then checked against the lowered text instead
+        original = text if len(lowered) == len(text) else lowered
+        matches = []
+        state = 0
+        for end, char in enumerate(lowered, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, canonical in self._output[state]:
+                start = end - length
+                if not _is_word_boundary(original, start, end):
+                    continue
+                # All-lowercase text is an ordinary word ("apple"), not the brand
+                if original[start:end].islower() and not canonical.islower():
+                    continue
+                matches.append((start, end, canonical))
+
+        selected = []
+        last_end = 0
+        for start, end, canonical in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if start >= last_end:
+                selected.append((start, end, canonical))
+                last_end = end
+        return selected
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def load_seed_brands(path: str) -> Dict[str, str]:
+    """
+    Reads the seed list: one brand per line as "Canonical | alias | alias".
+
+    Blank lines and lines starting with # are ignored.
+    """
+    patterns = {}
+    if not os.path.exists(path):
+        return patterns
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            names = [name.strip() for name in line.split("|") if name.strip()]
+            for name in names:
+                patterns[name.lower()] = names[0]
+    return patterns
+
+
+class Gazetteer:
+    """Seed and learned brand names, matched against page text with Aho-Corasick."""
+
+    def __init__(
+        self,
+        seed_path: str,
+        path: str,
+        min_name_length: int = 3,
+        min_sightings: int = 3,
+        max_age: float = 90 * 86400
+    ):
+        self.seed_path = seed_path
+        self.path = path
+        self.min_name_length = min_name_length
+        self.min_sightings = min_sightings
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._automaton: Optional[AhoCorasick] = None
+        self._built_at = 0.0
+        self._seed_mtime: Optional[float] = None
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS learned_brands (
+                name TEXT PRIMARY KEY,
+                times_seen INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            )
+            """
+        )
+
+    def _get_automaton(self) -> AhoCorasick:
+        """Returns the compiled automaton, rebuilding it after the seed file changes or it got old."""
+        seed_mtime = os.path.getmtime(self.seed_path) if os.path.exists(self.seed_path) else None
+        with self._lock:
+            now = time.time()
+            if (
+                self._automaton is None
+                or seed_mtime != self._seed_mtime
+                or now - self._built_at > AUTOMATON_MAX_AGE
+            ):
+                patterns = {
+                    row[0].lower(): row[0]
+                    for row in self._conn.execute(
+                        "SELECT name FROM learned_brands WHERE times_seen >= ? AND last_seen >= ?",
+                        (self.min_sightings, now - self.max_age)
+                    )
+                }
+                # Seed entries win over learned spellings of the same name
+                patterns.update(load_seed_brands(self.seed_path))
+                self._automaton = AhoCorasick(patterns)
+                self._built_at = now
+                self._seed_mtime = seed_mtime
+            return self._automaton
+
+    def match(self, texts: Iterable[str]) -> Dict[str, int]:
+        """Counts mentions of every known brand across texts, most mentioned first."""
+        automaton = self._get_automaton()
+        counts: Counter = Counter()
+        for text in texts:
+            counts.update(canonical for _, _, canonical in automaton.find(text or ""))
+        return dict(counts.most_common())
+
+    def learn(self, names: Iterable[str]) -> None:
+        """
+        Records a sighting of brand names found by the LLM; once seen in
+        min_sightings extractions, later runs match them directly.
+        """
+        now = time.time()
+        rows = [(name, now) for name in {n.strip() for n in names} if len(name) >= self.min_name_length]
+        if not rows:
+            return
+        with self._lock:
+            # Names unseen for max_age start counting again
+            self._conn.execute("DELETE FROM learned_brands WHERE last_seen < ?", (now - self.max_age,))
+            self._conn.executemany(
+                """
+                INSERT INTO learned_brands VALUES (?, 1, ?)
+                ON CONFLICT(name) DO UPDATE SET times_seen = times_seen + 1, last_seen = excluded.last_seen
+                """,
+                rows
+            )
+            self._automaton = None
+
+
+def create_gazetteer() -> Optional[Gazetteer]:
+    """Creates the gazetteer from settings, or None when disabled."""
+    if not settings.GAZETTEER_ENABLED:
+        return None
+    return Gazetteer(
+        settings.GAZETTEER_SEED_PATH,
+        settings.GAZETTEER_PATH,
+        min_sightings=settings.GAZETTEER_MIN_SIGHTINGS,
+        max_age=settings.GAZETTEER_MAX_AGE
+    )
+
+
+# Global instance
+gazetteer = create_gazetteer()
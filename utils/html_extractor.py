@@ -0,0 +1,120 @@
+"""
+Streaming extraction of a page's title and paragraph text. The body is
+read incrementally with a hard byte cap and fed to an incremental HTML
+parser that stops as soon as enough paragraph text has been collected.
+"""
+
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, List
+
+import httpx
+
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class ParagraphExtractor(HTMLParser):
+    """Incremental parser collecting the first <title> and the text inside <p> tags."""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+    def __init__(self, max_chars: int = 2000):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title_parts: List[str] = []
+        self.paragraphs: List[List[str]] = []
+        self._title_done = False
+        self._in_title = False
+        self._paragraph_depth = 0
+        self._skip_depth = 0
+        self._chars = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether enough paragraph text has been collected."""
+        return self._chars >= self.max_chars
+
+    @property
+    def title(self) -> str:
+        return "".join(self.title_parts)
+
+    @property
+    def description(self) -> str:
+        return " ".join("".join(parts) for parts in self.paragraphs)[:self.max_chars]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and not self._title_done:
+            self._in_title = True
+        elif tag == "p":
+            if self._paragraph_depth == 0:
+                self.paragraphs.append([])
+                # Account for the separator between paragraphs
+                self._chars += 1 if len(self.paragraphs) > 1 else 0
+            self._paragraph_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self._title_done = True
+        elif tag == "p":
+            self._paragraph_depth = max(0, self._paragraph_depth - 1)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+        if self._paragraph_depth:
+            self.paragraphs[-1].append(data)
+            self._chars += len(data)
+
+
+def is_html_response(response: httpx.Response) -> bool:
+    """Whether the response declares an HTML body (or declares nothing)."""
+    content_type = response.headers.get("Content-Type", "")
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+async def aextract_page(
+    url: str,
+    response: httpx.Response,
+    max_bytes: int = 512 * 1024,
+    max_chars: int = 2000
+) -> Dict[str, str]:
+    """
+    Extracts title and paragraph text from a streamed response.
+
+    Args:
+        url: URL the response was fetched from
+        response: Response opened with client.stream(), body not yet read
+        max_bytes: Hard cap on the number of body bytes read
+        max_chars: Paragraph characters to collect before stopping
+
+    Returns:
+        Dict with website, title and description
+    """
+    extractor = ParagraphExtractor(max_chars)
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    received = 0
+
+    async for chunk in response.aiter_bytes():
+        chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        extractor.feed(decoder.decode(chunk))
+        if extractor.done or received >= max_bytes:
+            break
+    extractor.feed(decoder.decode(b"", final=True))
+    # Flush text still buffered by the parser, e.g. a paragraph cut off by the byte cap
+    extractor.close()
+
+    return {"website": url, "title": extractor.title, "description": extractor.description}
@@ -0,0 +1,262 @@
+"""
+Shared async HTTP client for scraping and search calls.
+One httpx.AsyncClient is kept per event loop so connections are reused
+across nodes instead of being opened for every request.
+
+The client keeps idle connections alive per host, speaks HTTP/2 when the
+h2 package is installed, negotiates gzip (and brotli when the brotli
+package is installed) and caches DNS lookups process-wide.
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import ipaddress
+import socket
+import threading
+import time
+import weakref
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import anyio
+import httpcore
+import httpx
+import openai
+
+from config.config import settings
+from utils.metrics import record_cache
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+class DNSCache:
+    """Resolved addresses per (host, port), shared by every loop's client."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            record_cache("dns", True)
+            return entry[1]
+        record_cache("dns", False)
+
+        infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        # Keep resolver order (it already prefers the usable address family) without duplicates
+        addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+dns_cache = DNSCache(settings.HTTP_DNS_CACHE_TTL)
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend connecting to cached addresses instead of resolving every connection."""
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, cache: DNSCache):
+        self.backend = backend
+        self.cache = cache
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            ipaddress.ip_address(host)
+            is_ip = True
+        except ValueError:
+            is_ip = False
+        if is_ip:
+            return await self.backend.connect_tcp(host, port, timeout, local_address, socket_options)
+
+        try:
+            addresses = await self.cache.resolve(host, port)
+        except OSError:
+            # Let the backend raise its usual ConnectError for unresolvable hosts
+            return await self.backend.connect_tcp(host, port, timeout, local_address, socket_options)
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                # TLS still verifies against the host name: httpcore passes it as server_hostname
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # The cached addresses may be stale
+        self.cache.forget(host, port)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: Optional[Iterable] = None
+    ) -> httpcore.AsyncNetworkStream:
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+# httpcore exceptions and the httpx ones raised in their place, most specific first
+HTTPCORE_EXCEPTIONS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextlib.contextmanager
+def _map_httpcore_exceptions() -> Iterator[None]:
+    """Raises httpcore errors as their httpx counterparts, as httpx's own transport does."""
+    try:
+        yield
+    except Exception as e:
+        for source, target in HTTPCORE_EXCEPTIONS:
+            if isinstance(e, source):
+                raise target(str(e)) from e
+        raise
+
+
+class _PoolResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterable[bytes]):
+        self.stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _map_httpcore_exceptions():
+            async for part in self.stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self.stream, "aclose"):
+            await self.stream.aclose()
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore connection pool built by the caller.
+    httpx.AsyncHTTPTransport does not take a network backend, so the DNS
+    cache needs its own pool.
+    """
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions
+        )
+        with _map_httpcore_exceptions():
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolResponseStream(response.stream),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+def _create_transport() -> httpx.AsyncBaseTransport:
+    http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+    if settings.HTTP_DNS_CACHE_TTL <= 0:
+        return httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return PoolTransport(httpcore.AsyncConnectionPool(
+        ssl_context=httpx.create_ssl_context(),
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        http1=True,
+        http2=http2,
+        network_backend=CachingDNSBackend(httpcore.AnyIOBackend(), dns_cache)
+    ))
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared AsyncClient bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        # Accept-Encoding defaults to every decoder httpx has, including brotli when installed
+        client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(10.0),
+            follow_redirects=True,
+            transport=_create_transport()
+        )
+        _clients[loop] = client
+    return client
+
+
+def get_async_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    """Returns an AsyncOpenAI client that shares the loop's connection pool."""
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None or client.api_key != api_key:
+        client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=settings.OPENAI_BASE_URL or None,
+            http_client=get_http_client(),
+            # Retries go through utils.agent_utils.aretry and the shared rate limiter
+            max_retries=0
+        )
+        _openai_clients[loop] = client
+    return client
+
+
+async def aclose_http_client() -> None:
+    """Closes the AsyncClient bound to the running event loop, if any."""
+    loop = asyncio.get_running_loop()
+    _openai_clients.pop(loop, None)
+    client = _clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
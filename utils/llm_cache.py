@@ -0,0 +1,105 @@
+"""
+Content-addressed cache for chat completions. Responses are keyed by a
+hash of the model, messages and sampling parameters and kept in SQLite
+with a TTL and a bound on the number of entries.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config.config import settings
+from utils.cache import connect_sqlite
+
+
+# Cache modes: "on" reads and writes, "refresh" skips reads but stores the
+# new response, "bypass" neither reads nor writes.
+CACHE_MODES = ("on", "refresh", "bypass")
+
+
+class LLMCache:
+    """SQLite cache of chat completion responses."""
+
+    def __init__(self, path: str, ttl: int = 7 * 86400, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """Hashes everything that determines a completion."""
+        raw = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a cached response, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        """Stores a response and evicts expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(response), now + self.ttl, now)
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """Removes every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+def create_llm_cache() -> Optional[LLMCache]:
+    """Creates the LLM cache from settings, or None when disabled."""
+    if settings.LLM_CACHE_MODE == "bypass":
+        return None
+    return LLMCache(
+        path=settings.LLM_CACHE_PATH,
+        ttl=settings.LLM_CACHE_TTL,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES
+    )
+
+
+# Global instance
+llm_cache = create_llm_cache()
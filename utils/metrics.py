@@ -0,0 +1,301 @@
+"""
+Process-wide metrics in the Prometheus text exposition format. A minimal
+registry of counters, gauges and histograms with labels; api/app.py serves
+it on /metrics next to the REST API and the Gradio app.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """A metric family: one value (or histogram) per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. work in flight."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        """Counts the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the wall-clock duration of the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Global registry and the application's metrics
+registry = MetricsRegistry()
+
+NODE_DURATION = registry.register(Histogram(
+    "competitor_analyzer_node_duration_seconds",
+    "Time spent in each workflow node.",
+    ["node"]
+))
+NODE_ERRORS = registry.register(Counter(
+    "competitor_analyzer_node_errors_total",
+    "Workflow nodes that raised or returned an error.",
+    ["node"]
+))
+UPSTREAM_DURATION = registry.register(Histogram(
+    "competitor_analyzer_upstream_duration_seconds",
+    "Latency of calls to Serper, OpenAI and scraped websites.",
+    ["upstream", "operation"]
+))
+UPSTREAM_ERRORS = registry.register(Counter(
+    "competitor_analyzer_upstream_errors_total",
+    "Failed calls to Serper, OpenAI and scraped websites.",
+    ["upstream", "operation"]
+))
+MOCK_FALLBACKS = registry.register(Counter(
+    "competitor_analyzer_mock_fallbacks_total",
+    "Results served from mock data because an API was unavailable.",
+    ["component"]
+))
+CACHE_REQUESTS = registry.register(Counter(
+    "competitor_analyzer_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"]
+))
+COALESCED_REQUESTS = registry.register(Counter(
+    "competitor_analyzer_coalesced_requests_total",
+    "Requests that attached to an identical in-flight execution instead of starting one.",
+    ["operation"]
+))
+WORKFLOWS_IN_FLIGHT = registry.register(Gauge(
+    "competitor_analyzer_workflows_in_flight",
+    "Workflow runs currently executing.",
+    ["kind"]
+))
+WORKFLOW_DURATION = registry.register(Histogram(
+    "competitor_analyzer_workflow_duration_seconds",
+    "End-to-end duration of workflow runs.",
+    ["kind"]
+))
+REPORT_SECTION_REFRESHES = registry.register(Counter(
+    "competitor_analyzer_report_sections_total",
+    "Report sections of refreshed reports, reused or regenerated.",
+    ["result"]
+))
+API_JOBS_QUEUED = registry.register(Gauge(
+    "competitor_analyzer_api_jobs_queued",
+    "REST API jobs waiting for a worker.",
+    ["kind"]
+))
+API_JOBS = registry.register(Counter(
+    "competitor_analyzer_api_jobs_total",
+    "Finished REST API jobs by outcome.",
+    ["kind", "status"]
+))
+PREFETCHES = registry.register(Counter(
+    "competitor_analyzer_prefetches_total",
+    "Speculative competitor prefetches by outcome.",
+    ["result"]
+))
+
+
+class track_upstream:
+    """Times an upstream call and counts it as an error if it raises; usable with or without async."""
+
+    def __init__(self, upstream: str, operation: str):
+        self.labels = {"upstream": upstream, "operation": operation}
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        UPSTREAM_DURATION.observe(time.perf_counter() - self._started, **self.labels)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            UPSTREAM_ERRORS.inc(**self.labels)
+
+    async def __aenter__(self) -> None:
+        self.__enter__()
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+@contextmanager
+def track_workflow(kind: str) -> Iterator[None]:
+    """Counts a workflow run as in flight and times it."""
+    with WORKFLOWS_IN_FLIGHT.track_inprogress(kind=kind), WORKFLOW_DURATION.time(kind=kind):
+        yield
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Wraps a workflow node (sync or async) with latency and error metrics."""
+
+    def record(result: Any) -> Any:
+        if isinstance(result, dict) and result.get("error_message"):
+            NODE_ERRORS.inc(node=name)
+        return result
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with NODE_DURATION.time(node=name):
+                try:
+                    return record(await node(*args, **kwargs))
+                except Exception:
+                    NODE_ERRORS.inc(node=name)
+                    raise
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with NODE_DURATION.time(node=name):
+            try:
+                return record(node(*args, **kwargs))
+            except Exception:
+                NODE_ERRORS.inc(node=name)
+                raise
+    return wrapper
@@ -0,0 +1,129 @@
+"""
+On-disk cache of extracted page content keyed by URL. Entries keep the
+validators (ETag / Last-Modified) needed to revalidate stale pages with
+conditional requests, so unchanged pages come back as a cheap 304.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.config import settings
+from utils.cache import connect_sqlite
+
+
+class PageCache:
+    """SQLite cache of scraped pages with freshness and size-bounded LRU eviction."""
+
+    def __init__(self, path: str, max_age: int = 6 * 3600, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry for a URL, fresh or stale, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, description, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        title, description, etag, last_modified, fetched_at = row
+        return {
+            "data": {"website": url, "title": title, "description": description},
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether an entry can be served without revalidation."""
+        return time.time() - entry["fetched_at"] < self.max_age
+
+    def revalidation_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for a stale entry."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str) -> None:
+        """Marks an entry as fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+            )
+
+    def store(
+        self,
+        url: str,
+        data: Dict[str, str],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """Stores extracted page data and evicts least recently used pages over max_bytes."""
+        title = data.get("title", "")
+        description = data.get("description", "")
+        size = len(url) + len(title.encode("utf-8")) + len(description.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, title, description, etag, last_modified, now, now, size)
+            )
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes every cached page."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", evicted)
+
+
+def create_page_cache() -> Optional[PageCache]:
+    """Creates the page cache from settings, or None when disabled."""
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    return PageCache(
+        path=settings.PAGE_CACHE_PATH,
+        max_age=settings.PAGE_CACHE_MAX_AGE,
+        max_bytes=settings.PAGE_CACHE_MAX_BYTES
+    )
+
+
+# Global instance
+page_cache = create_page_cache()
@@ -0,0 +1,127 @@
+"""
+Token-budgeted assembly of report prompt sources. Sources are cleaned of
+repeated paragraphs and sentences, then a fixed token budget is shared
+between them by priority weight so every report request has a
+predictable input size.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Counts GPT-4o tokens, approximating 4 characters per token without tiktoken."""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model("gpt-4o") if tiktoken else False
+        except Exception:
+            # The encoding is downloaded on first use and may be unavailable offline
+            _encoding = False
+    if _encoding is False:
+        return max(1, len(text) // 4)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+def deduplicate_sources(sources: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Removes paragraphs and sentences already seen in an earlier source.
+
+    Args:
+        sources: (name, text) pairs in priority order; earlier sources keep
+            the copy of any repeated text
+
+    Returns:
+        Unique sentences per source, in their original order
+    """
+    seen_paragraphs = set()
+    seen_sentences = set()
+    result = {}
+    for name, text in sources:
+        kept = []
+        for paragraph in re.split(r"\n\s*\n|\n", text or ""):
+            key = _normalize(paragraph)
+            if not key or key in seen_paragraphs:
+                continue
+            seen_paragraphs.add(key)
+            for sentence in _SENTENCE_SPLIT.split(paragraph):
+                sentence_key = _normalize(sentence)
+                if sentence_key and sentence_key not in seen_sentences:
+                    seen_sentences.add(sentence_key)
+                    kept.append(sentence.strip())
+        result[name] = kept
+    return result
+
+
+def allocate_budget(demands: Dict[str, int], weights: Dict[str, float], budget: int) -> Dict[str, int]:
+    """
+    Shares a token budget between sources by weight.
+
+    Sources needing less than their share get exactly what they need and
+    the remainder is redistributed among the others.
+    """
+    allocation = {name: 0 for name in demands}
+    active = {name for name, demand in demands.items() if demand > 0}
+    remaining = budget
+    while active and remaining > 0:
+        total_weight = sum(weights.get(name, 1.0) for name in active)
+        shares = {name: remaining * weights.get(name, 1.0) / total_weight for name in active}
+        satisfied = {name for name in active if demands[name] <= shares[name]}
+        if not satisfied:
+            for name in active:
+                allocation[name] = int(shares[name])
+            break
+        for name in satisfied:
+            allocation[name] = demands[name]
+            remaining -= demands[name]
+        active -= satisfied
+    return allocation
+
+
+def build_budgeted_sources(
+    sources: List[Tuple[str, str]],
+    budget: int,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, str]:
+    """
+    Deduplicates sources and trims them to fit a shared token budget.
+
+    Args:
+        sources: (name, text) pairs in priority order
+        budget: Total tokens available for all sources
+        weights: Relative share of the budget per source name (default 1)
+
+    Returns:
+        Trimmed text per source name, cut at sentence boundaries
+    """
+    weights = weights or {}
+    sentences = deduplicate_sources(sources)
+    token_counts = {name: [count_tokens(s) + 1 for s in items] for name, items in sentences.items()}
+    demands = {name: sum(counts) for name, counts in token_counts.items()}
+    allocation = allocate_budget(demands, weights, budget)
+
+    result = {}
+    for name, items in sentences.items():
+        kept, used = [], 0
+        for sentence, tokens in zip(items, token_counts[name]):
+            if used + tokens > allocation[name]:
+                break
+            kept.append(sentence)
+            used += tokens
+        result[name] = " ".join(kept)
+    return result
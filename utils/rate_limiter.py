@@ -0,0 +1,138 @@
+"""
+Process-wide rate limiting for upstream APIs. Each upstream (Serper,
+OpenAI) gets a token bucket for requests and optionally one for LLM
+tokens; every call site reserves capacity before sending a request.
+Also holds the backoff policy (exponential with full jitter, honoring
+Retry-After) used by utils.agent_utils.retry / aretry.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import openai
+
+from config.config import settings
+
+
+class TokenBucket:
+    """Thread-safe token bucket; reservations may go into debt and wait it off."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Reserves capacity and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class UpstreamLimiter:
+    """Request and token budgets for one upstream, plus a shared pause after 429s."""
+
+    def __init__(self, name: str, requests_per_second: float, tokens_per_minute: Optional[float] = None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserves one request (and tokens) and returns the seconds to wait."""
+        wait = self.requests.reserve(1)
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        with self._lock:
+            pause = self._paused_until - time.monotonic()
+        return max(wait, pause, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller of this upstream, e.g. after a Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        if (wait := self.reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int = 0) -> None:
+        if (wait := self.reserve(tokens)) > 0:
+            time.sleep(wait)
+
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> UpstreamLimiter:
+    """Returns the process-wide limiter for "serper" or "openai"."""
+    with _limiters_lock:
+        if upstream not in _limiters:
+            if upstream == "serper":
+                _limiters[upstream] = UpstreamLimiter(upstream, settings.SERPER_REQUESTS_PER_SECOND)
+            elif upstream == "openai":
+                _limiters[upstream] = UpstreamLimiter(
+                    upstream,
+                    settings.OPENAI_REQUESTS_PER_MINUTE / 60,
+                    settings.OPENAI_TOKENS_PER_MINUTE
+                )
+            else:
+                raise ValueError(f"Unknown upstream: {upstream}")
+        return _limiters[upstream]
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+    """Rough token count of a chat request (about 4 characters per token) plus its output."""
+    prompt_tokens = sum(len(message.get("content") or "") for message in messages) // 4
+    return prompt_tokens + (max_tokens or settings.OPENAI_EXPECTED_OUTPUT_TOKENS)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[float]]:
+    """Returns whether an error is worth retrying and the server's Retry-After, if any."""
+    response = None
+    if isinstance(error, httpx.HTTPStatusError):
+        response = error.response
+    elif isinstance(error, openai.APIStatusError):
+        response = error.response
+    elif isinstance(error, (httpx.TransportError, openai.APIConnectionError)):
+        return True, None
+
+    if response is None:
+        return False, None
+    retryable = response.status_code == 429 or response.status_code >= 500
+    return retryable, parse_retry_after(response.headers.get("Retry-After"))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, never shorter than Retry-After."""
+    ceiling = min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
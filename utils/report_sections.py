@@ -0,0 +1,101 @@
+"""
+The sections of an analysis report and the sources each one is written
+from. Reports put every section under its own Markdown heading, so a stored
+report can be split back into sections and single sections replaced. Each
+section is fingerprinted by the content hashes of its sources; refreshing
+a report only regenerates the sections whose sources changed.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+# Section title -> sources it is written from ("company" is the company's own site)
+REPORT_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "Company Overview": ("company",),
+    "Strengths & Weaknesses": ("company", "reviews", "market_analysis", "third_party"),
+    "Market Position": ("market_analysis", "financials"),
+    "Unique Selling Proposition (USP)": ("company", "third_party"),
+    "Online Presence & Branding": ("company",),
+    "Marketing & Advertising Strategy": ("company", "market_analysis"),
+    "Key Products & Services": ("company",),
+    "Customer Review Summary & Sentiment": ("reviews",),
+    "Market and Financial Data": ("market_analysis", "financials"),
+    "Third-Party Evaluation": ("third_party",),
+    "Key Takeaways": ("company", "reviews", "market_analysis", "financials", "third_party"),
+}
+
+# Written from the other sections when sections are generated in parallel
+SYNTHESIS_SECTION = "Key Takeaways"
+
+_HEADING = re.compile(r"^#{1,4}\s+(?:\d+[.)]\s*)?(.+?)\s*#*\s*$")
+
+
+def fingerprint_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint_inputs(state: Mapping[str, Any]) -> Dict[str, str]:
+    """Fingerprints of the company site and each external source collected in a workflow state."""
+    fingerprints = {"company": fingerprint_text(state.get("company_data", {}).get("description", ""))}
+    for source, text in sorted((state.get("external_sections") or {}).items()):
+        fingerprints[source] = fingerprint_text(text)
+    return fingerprints
+
+
+def section_fingerprints(input_fingerprints: Mapping[str, str]) -> Dict[str, Dict[str, str]]:
+    """Fingerprints of the sources behind every section."""
+    return {
+        title: {source: input_fingerprints.get(source, "") for source in sources}
+        for title, sources in REPORT_SECTIONS.items()
+    }
+
+
+def stale_sections(
+    previous: Mapping[str, Mapping[str, str]],
+    current: Mapping[str, Mapping[str, str]]
+) -> List[str]:
+    """Sections whose sources changed (or were not recorded) since the previous report."""
+    return [title for title in REPORT_SECTIONS if previous.get(title) != current.get(title)]
+
+
+def _normalize_title(title: str) -> str:
+    title = title.lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", title).split())
+
+
+def split_report(report: str, titles: Iterable[str] = REPORT_SECTIONS) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Splits a report into the text before the first section and section
+    title -> section text (heading included), in report order. Returns
+    None when any of the expected sections is missing.
+    """
+    known = {_normalize_title(title): title for title in titles}
+    preamble: List[str] = []
+    sections: Dict[str, str] = {}
+    current = None
+    for line in report.splitlines(keepends=True):
+        match = _HEADING.match(line.strip())
+        title = known.get(_normalize_title(match.group(1).strip("*_ "))) if match else None
+        if title and title not in sections:
+            current = title
+            sections[title] = line
+        elif current:
+            sections[current] += line
+        else:
+            preamble.append(line)
+    if len(sections) != len(known):
+        return None
+    return "".join(preamble), sections
+
+
+def splice_report(report: str, replacements: Mapping[str, str]) -> Optional[str]:
+    """Replaces sections of a report, keeping its order; None if the report cannot be split."""
+    split = split_report(report)
+    if split is None:
+        return None
+    preamble, sections = split
+    sections.update({title: text for title, text in replacements.items() if title in sections})
+    parts = [preamble.strip()] + [text.strip() for text in sections.values()]
+    return "\n\n".join(part for part in parts if part)
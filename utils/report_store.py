@@ -0,0 +1,188 @@
+"""
+Persistent store of finished analysis reports. Every report is kept with
+the request it answers (company, competitor, location), fingerprints of the
+source texts it was generated from (overall and per section), its token
+usage and timestamp, and is indexed with SQLite FTS5 for keyword search
+across past reports.
+"""
+
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from config.config import settings
+from utils.cache import connect_sqlite
+from utils.report_sections import fingerprint_inputs, section_fingerprints
+
+
+_COLUMNS = (
+    "id", "company", "competitor", "location", "target", "website", "report",
+    "input_fingerprints", "section_fingerprints", "prompt_tokens", "completion_tokens",
+    "total_tokens", "created_at"
+)
+
+
+def make_request_key(company: str, competitor: Optional[str], location: Optional[str]) -> str:
+    """Key shared by every report answering the same request."""
+    parts = [" ".join((part or "").split()).lower() for part in (company, competitor, location or "global")]
+    return json.dumps(parts)
+
+
+def _fts_query(query: str) -> str:
+    """Turns free text into an FTS5 query matching every word, immune to FTS syntax."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", query))
+
+
+class ReportStore:
+    """SQLite store of generated reports with a full-text index."""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                request_key TEXT NOT NULL,
+                company TEXT NOT NULL,
+                competitor TEXT,
+                location TEXT NOT NULL,
+                target TEXT NOT NULL,
+                website TEXT,
+                report TEXT NOT NULL,
+                input_fingerprints TEXT NOT NULL,
+                section_fingerprints TEXT NOT NULL DEFAULT '{}',
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reports_request ON reports (request_key, created_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                target, company, report, content='reports', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS reports_fts_insert AFTER INSERT ON reports BEGIN
+                INSERT INTO reports_fts (rowid, target, company, report)
+                VALUES (new.id, new.target, new.company, new.report);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reports_fts_delete AFTER DELETE ON reports BEGIN
+                INSERT INTO reports_fts (reports_fts, rowid, target, company, report)
+                VALUES ('delete', old.id, old.target, old.company, old.report);
+            END;
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+        if "section_fingerprints" not in columns:
+            # Stores created before per-section fingerprints
+            self._conn.execute("ALTER TABLE reports ADD COLUMN section_fingerprints TEXT NOT NULL DEFAULT '{}'")
+
+    @staticmethod
+    def _to_dict(row: tuple) -> Dict[str, Any]:
+        entry = dict(zip(_COLUMNS, row))
+        entry["input_fingerprints"] = json.loads(entry["input_fingerprints"])
+        entry["section_fingerprints"] = json.loads(entry["section_fingerprints"])
+        return entry
+
+    def save(
+        self,
+        company: str,
+        competitor: Optional[str],
+        location: str,
+        state: Mapping[str, Any]
+    ) -> int:
+        """Stores the report of a finished workflow state and returns its id."""
+        usage = state.get("token_usage") or {}
+        fingerprints = fingerprint_inputs(state)
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO reports (
+                    request_key, company, competitor, location, target, website, report,
+                    input_fingerprints, section_fingerprints, prompt_tokens, completion_tokens,
+                    total_tokens, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    make_request_key(company, competitor, location),
+                    company,
+                    competitor,
+                    location or "global",
+                    state.get("target_company") or competitor or company,
+                    state.get("company_website"),
+                    state["analysis_report"],
+                    json.dumps(fingerprints),
+                    json.dumps(section_fingerprints(fingerprints)),
+                    usage.get("prompt_tokens", 0),
+                    usage.get("completion_tokens", 0),
+                    usage.get("total_tokens", 0),
+                    time.time(),
+                )
+            )
+            report_id = cursor.lastrowid
+            self._conn.execute(
+                "DELETE FROM reports WHERE id IN (SELECT id FROM reports ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        return report_id
+
+    def get(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def latest(
+        self,
+        company: str,
+        competitor: Optional[str],
+        location: str,
+        max_age: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the newest report for a request, optionally no older than max_age seconds."""
+        oldest = time.time() - max_age if max_age is not None else 0.0
+        with self._lock:
+            row = self._conn.execute(
+                f"""
+                SELECT {', '.join(_COLUMNS)} FROM reports
+                WHERE request_key = ? AND created_at >= ?
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (make_request_key(company, competitor, location), oldest)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Reports matching every word of the query, best matches first, with a snippet instead of the body."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT r.id, r.company, r.competitor, r.location, r.target, r.created_at, r.total_tokens,
+                       snippet(reports_fts, 2, '**', '**', '…', 24)
+                FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid
+                WHERE reports_fts MATCH ?
+                ORDER BY bm25(reports_fts, 5.0, 2.0, 1.0)
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+        fields = ("id", "company", "competitor", "location", "target", "created_at", "total_tokens", "snippet")
+        return [dict(zip(fields, row)) for row in rows]
+
+
+def create_report_store() -> Optional[ReportStore]:
+    """Creates the report store from settings, or None when disabled."""
+    if not settings.REPORT_STORE_ENABLED:
+        return None
+    return ReportStore(path=settings.REPORT_STORE_PATH, max_entries=settings.REPORT_STORE_MAX_ENTRIES)
+
+
+# Global instance
+report_store = create_report_store()
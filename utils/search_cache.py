@@ -0,0 +1,162 @@
+"""
+Two-tier cache for Serper search results: an in-process LRU in front of an
+on-disk SQLite store, with TTLs chosen by the kind of query.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config.config import settings
+from utils.agent_utils import log_thought
+from utils.cache import LRUCache, connect_sqlite
+
+
+# Query suffixes used across the workflow, mapped to their query type
+QUERY_TYPES = [
+    ("official website", "official_website"),
+    ("brands competitors", "competitors"),
+    ("customer reviews", "reviews"),
+    ("market analysis", "market_analysis"),
+    ("financial data", "financials"),
+    ("third party evaluation", "third_party"),
+]
+
+
+def classify_query(query: str) -> str:
+    """Returns the query type used to pick a TTL."""
+    query_lower = query.lower()
+    for marker, query_type in QUERY_TYPES:
+        if marker in query_lower:
+            return query_type
+    return "default"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases and collapses whitespace so equivalent queries share a key."""
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class SearchCache:
+    """LRU + SQLite cache for search results keyed on query, num and location."""
+
+    def __init__(
+        self,
+        path: str,
+        memory_size: int = 512,
+        max_entries: int = 10000,
+        ttls: Optional[Dict[str, int]] = None
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.memory = LRUCache(memory_size)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                query_type TEXT NOT NULL,
+                results TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS search_cache_last_access ON search_cache (last_access)"
+        )
+
+    def make_key(self, query: str, num: int, location: Optional[str] = None) -> str:
+        """Builds a normalized cache key for a search."""
+        raw = json.dumps([normalize_query(query), num, normalize_query(location or "global")])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, query: str) -> int:
+        """Returns the TTL in seconds for a query based on its type."""
+        return self.ttls.get(classify_query(query), self.ttls.get("default", 86400))
+
+    def get(self, query: str, num: int, location: Optional[str] = None) -> Optional[List[Dict[str, str]]]:
+        """Returns cached results for a search, or None on a miss."""
+        key = self.make_key(query, num, location)
+
+        results = self.memory.get(key)
+        if results is not None:
+            self._count("memory_hits")
+            return results
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                self._conn.execute(
+                    "UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key)
+                )
+
+        if row is None or row[1] <= now:
+            self._count("misses")
+            return None
+
+        results = json.loads(row[0])
+        self.memory.set(key, results, row[1] - now)
+        self._count("disk_hits")
+        return results
+
+    def set(
+        self,
+        query: str,
+        num: int,
+        location: Optional[str],
+        results: List[Dict[str, str]]
+    ) -> None:
+        """Stores results for a search and evicts expired and least recently used rows."""
+        key = self.make_key(query, num, location)
+        ttl = self.ttl_for(query)
+        now = time.time()
+
+        self.memory.set(key, results, ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, classify_query(query), json.dumps(results), now + ttl, now)
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM search_cache WHERE key IN (
+                    SELECT key FROM search_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """Removes every cached search."""
+        self.memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+        if stat != "misses":
+            log_thought(f"⚡ Search cache {stat.replace('_', ' ')[:-1]} ({self.stats})")
+
+
+def create_search_cache() -> Optional[SearchCache]:
+    """Creates the search cache from settings, or None when disabled."""
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    return SearchCache(
+        path=settings.SEARCH_CACHE_PATH,
+        memory_size=settings.SEARCH_CACHE_MEMORY_SIZE,
+        max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+        ttls=settings.SEARCH_CACHE_TTLS
+    )
@@ -3,20 +3,22 @@ Serper API integration for reliable web search in competitor analysis.
 This replaces the unreliable Google Search library with a professional API.
 """
 
-import os
-import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config.config import settings
-from utils.agent_utils import log_thought
+from utils.agent_utils import aretry, log_thought
+from utils.async_utils import concurrency_limit, run_sync
+from utils.http_client import get_http_client
+from utils.metrics import MOCK_FALLBACKS, record_cache, track_upstream
+from utils.search_cache import create_search_cache
 
 
 class SerperSearchTool:
     """Professional web search using Serper API."""
     
-    ENDPOINT = "https://google.serper.dev/search"
-    
     def __init__(self, k: int = 5):
         self.k = k
+        self.endpoint = settings.SERPER_ENDPOINT
+        self.cache = create_search_cache()
         key = settings.SERPER_API_KEY
         if not key or key == "your_serper_api_key_here":
             log_thought("⚠️ SERPER_API_KEY not configured, using mock data")
@@ -25,40 +27,51 @@ class SerperSearchTool:
             self.headers = {"X-API-KEY": key, "Content-Type": "application/json"}
             self.api_available = True
     
-    def search(self, query: str) -> List[Dict[str, str]]:
+    def search(self, query: str, location: Optional[str] = None) -> List[Dict[str, str]]:
         """
         Search using Serper API and return structured results.
         
         Args:
             query: Search query string
+            location: Optional Serper location to search from
             
         Returns:
             List of search results with title, url, and snippet
         """
+        return run_sync(self.asearch(query, location))
+    
+    async def asearch(self, query: str, location: Optional[str] = None) -> List[Dict[str, str]]:
+        """Async version of search using the shared httpx client."""
         log_thought(f"🔍 Serper search: {query}")
         
+        if self.cache:
+            cached = self.cache.get(query, self.k, location)
+            record_cache("search", cached is not None)
+            if cached is not None:
+                return cached
+        
         if not self.api_available:
             return self._get_mock_results(query)
         
         try:
             payload = {"q": query, "num": self.k}
-            response = requests.post(
-                self.ENDPOINT, 
-                headers=self.headers, 
-                json=payload, 
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
+            if location:
+                payload["location"] = location
+            async def post() -> Any:
+                async with concurrency_limit(), track_upstream("serper", "search"):
+                    response = await get_http_client().post(
+                        self.endpoint, 
+                        headers=self.headers, 
+                        json=payload, 
+                        timeout=10
+                    )
+                    response.raise_for_status()
+                return response
             
-            results = []
-            for item in data.get("organic", [])[:self.k]:
-                results.append({
-                    "title": item.get("title", ""),
-                    "url": item.get("link", ""),
-                    "snippet": item.get("snippet", ""),
-                    "content": item.get("snippet", "")  # Alias for compatibility
-                })
+            response = await aretry(post, upstream="serper")
+            results = self._parse_results(response.json())
+            if self.cache:
+                self.cache.set(query, self.k, location, results)
             
             log_thought(f"✅ Found {len(results)} results")
             return results
@@ -67,9 +80,22 @@ class SerperSearchTool:
             log_thought(f"❌ Serper API error: {e}")
             return self._get_mock_results(query)
     
+    def _parse_results(self, data: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Converts a Serper response into structured results."""
+        results = []
+        for item in data.get("organic", [])[:self.k]:
+            results.append({
+                "title": item.get("title", ""),
+                "url": item.get("link", ""),
+                "snippet": item.get("snippet", ""),
+                "content": item.get("snippet", "")  # Alias for compatibility
+            })
+        return results
+    
     def _get_mock_results(self, query: str) -> List[Dict[str, str]]:
         """Generate mock search results when API is unavailable."""
         log_thought("📝 Using mock search results")
+        MOCK_FALLBACKS.inc(component="serper")
         
         # Mock competitor data based on query
         mock_data = {
@@ -0,0 +1,153 @@
+"""
+Single-flight coalescing: concurrent calls with the same key attach to one
+in-flight execution and share its output instead of repeating the work.
+
+Executions are async iterators broadcast to every subscriber, so streamed
+output is shared too. A subscriber joining late first receives the most
+recent value, which loses nothing for streams of cumulative snapshots.
+Subscribers may live on different event loops (sync callers run on the
+background loop of run_sync); values are handed over thread-safely.
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+_Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+
+class FlightAbandoned(RuntimeError):
+    """The shared execution was cancelled before it finished."""
+
+
+class _Flight:
+    def __init__(self):
+        self.latest: Any = _MISSING
+        self.subscribers: List[_Subscriber] = []
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls onto one in-flight execution."""
+
+    def __init__(self, on_join: Optional[Callable[[Hashable], None]] = None):
+        self.on_join = on_join
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    async def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Yields the values of the execution for key, starting it if none is in flight.
+
+        The execution runs as its own task, so it keeps going for the other
+        subscribers when one of them stops listening; it is cancelled once
+        nobody is listening anymore.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._lock:
+            flight = self._flights.get(key)
+            joined = flight is not None
+            if not joined:
+                flight = _Flight()
+                flight.loop = loop
+                flight.task = loop.create_task(self._drive(key, flight, factory))
+                self._flights[key] = flight
+            elif flight.latest is not _MISSING:
+                queue.put_nowait(("value", flight.latest))
+            flight.subscribers.append(subscriber)
+        if joined and self.on_join:
+            self.on_join(key)
+
+        finished = False
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "value":
+                    yield value
+                elif kind == "error":
+                    finished = True
+                    raise value
+                else:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                self._unsubscribe(key, flight, subscriber)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Returns the result of the call for key, sharing it with concurrent callers."""
+        async def single() -> AsyncIterator[T]:
+            yield await factory()
+
+        result: Any = _MISSING
+        async for value in self.stream(key, single):
+            result = value
+        return result
+
+    async def _drive(self, key: Hashable, flight: _Flight, factory: Callable[[], AsyncIterator[T]]) -> None:
+        try:
+            async for value in factory():
+                self._publish(key, flight, "value", value)
+        except asyncio.CancelledError:
+            self._publish(key, flight, "error", FlightAbandoned(f"Shared execution for {key!r} was cancelled"))
+            raise
+        except Exception as e:
+            self._publish(key, flight, "error", e)
+        else:
+            self._publish(key, flight, "done", None)
+
+    def _publish(self, key: Hashable, flight: _Flight, kind: str, value: Any) -> None:
+        with self._lock:
+            if kind == "value":
+                flight.latest = value
+            elif self._flights.get(key) is flight:
+                # Finished flights take no new subscribers
+                del self._flights[key]
+            subscribers = list(flight.subscribers)
+        for loop, queue in subscribers:
+            _deliver(loop, queue, (kind, value))
+
+    def _unsubscribe(self, key: Hashable, flight: _Flight, subscriber: _Subscriber) -> None:
+        with self._lock:
+            if subscriber in flight.subscribers:
+                flight.subscribers.remove(subscriber)
+            if flight.subscribers:
+                return
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        # Nobody is listening anymore
+        if flight.task is not None and not flight.task.done():
+            if flight.loop is _running_loop():
+                flight.task.cancel()
+            elif not flight.loop.is_closed():
+                flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _deliver(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, item: Any) -> None:
+    if loop is _running_loop():
+        queue.put_nowait(item)
+    elif not loop.is_closed():
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # The subscriber's loop shut down in the meantime
+            pass
@@ -0,0 +1,61 @@
+"""
+Accounting of OpenAI token usage per workflow node. Completions report
+their usage to the accumulator of the node they run in (a context
+variable, so concurrent runs never mix), and the node returns it in the
+"token_usage" state field, which the graph sums across nodes.
+"""
+
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage() -> Iterator[Dict[str, int]]:
+    """Collects the usage of every completion made inside the block."""
+    usage = dict.fromkeys(USAGE_FIELDS, 0)
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def record_token_usage(usage: Any) -> None:
+    """Adds a completion's usage (an OpenAI usage object) to the current accumulator."""
+    current = _usage.get()
+    if current is None or usage is None:
+        return
+    for field in USAGE_FIELDS:
+        current[field] += getattr(usage, field, 0) or 0
+
+
+def with_token_usage(node: Callable) -> Callable:
+    """Wraps a workflow node (sync or async) so it returns the tokens it used."""
+
+    def attach(result: Any, usage: Dict[str, int]) -> Any:
+        if isinstance(result, dict) and usage["total_tokens"]:
+            return {**result, "token_usage": usage}
+        return result
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track_token_usage() as usage:
+                result = await node(*args, **kwargs)
+            return attach(result, usage)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with track_token_usage() as usage:
+            result = node(*args, **kwargs)
+        return attach(result, usage)
+    return wrapper